@@ -24,6 +24,16 @@ def clear_database():
     else:
         print("ℹ️ 数据库文件不存在")
     
+    # WAL模式产生的日志和共享内存文件
+    for suffix in ("-wal", "-shm"):
+        sidecar = Path(f"database.db{suffix}")
+        if sidecar.exists():
+            try:
+                sidecar.unlink()
+            except Exception as e:
+                print(f"❌ 删除数据库文件失败: {e}")
+                return False
+    
     return True
 
 def clear_config():
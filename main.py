@@ -9,6 +9,7 @@ E-Chat 邮件即时通讯软件 - 主程序入口
 
 import sys
 import os
+import logging
 import tkinter as tk
 from pathlib import Path
 
@@ -18,6 +19,9 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 def main():
     """主程序入口"""
+    # 各模块通过 logging 输出运行状态，INFO 及以上级别打印到控制台
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     try:
         # 导入主应用类
         from src.app import EChatApp
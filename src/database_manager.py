@@ -17,6 +17,12 @@ import logging
 # 导入语言管理器
 from src.language_manager import language_manager
 
+# 添加联系人的SQL，保持同一字符串对象以命中连接的预编译语句缓存
+_INSERT_CONTACT_SQL = """
+    INSERT INTO contacts (email, nickname, avatar_path, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
 
 class DatabaseManager:
     """数据库管理器 - 负责SQLite数据库的所有操作"""
@@ -49,10 +55,14 @@ class DatabaseManager:
             self.connection = sqlite3.connect(
                 self.db_path,
                 check_same_thread=False,
-                timeout=30.0
+                timeout=30.0,
+                cached_statements=256  # 加大预编译语句缓存，常用SQL只解析一次
             )
             # 启用外键约束
             self.connection.execute("PRAGMA foreign_keys = ON")
+            # WAL模式下提交只追加日志，配合 NORMAL 同步级别减少每次写入的fsync
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
             # 设置行工厂为字典格式
             self.connection.row_factory = sqlite3.Row
             
@@ -118,6 +128,7 @@ class DatabaseManager:
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_contact ON messages(contact_email)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_time ON messages(sent_at)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_contacts_email_nocase ON contacts(email COLLATE NOCASE)")
                 
                 self.connection.commit()
                 print("📋 数据表创建完成")
@@ -183,12 +194,8 @@ class DatabaseManager:
     def add_contact(self, email: str, nickname: str, avatar_path: str = None) -> bool:
         """添加联系人"""
         try:
-            query = """
-                INSERT INTO contacts (email, nickname, avatar_path, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-            """
             now = datetime.now()
-            self.execute_query(query, (email, nickname, avatar_path, now, now))
+            self.execute_query(_INSERT_CONTACT_SQL, (email, nickname, avatar_path, now, now))
             print(f"✅ 添加联系人成功: {nickname} ({email})")
             return True
         except sqlite3.IntegrityError:
@@ -239,6 +246,16 @@ class DatabaseManager:
             print(f"❌ 获取联系人失败: {e}")
             return None
     
+    def contact_exists(self, email: str) -> bool:
+        """检查联系人是否存在（邮箱不区分大小写）"""
+        try:
+            query = "SELECT EXISTS(SELECT 1 FROM contacts WHERE email = ? COLLATE NOCASE)"
+            row = self.execute_query(query, (email,), fetch_one=True)
+            return bool(row[0])
+        except Exception as e:
+            print(f"❌ 检查联系人失败: {e}")
+            return False
+    
     def update_contact(self, email: str, **kwargs) -> bool:
         """更新联系人信息"""
         try:
@@ -317,19 +334,33 @@ class DatabaseManager:
             print(f"❌ 添加消息失败: {e}")
             return False
     
-    def get_messages(self, contact_email: str, limit: int = 50, offset: int = 0) -> List[Dict]:
-        """获取与指定联系人的消息记录"""
+    def get_messages(self, contact_email: str, before_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        """获取与指定联系人的消息记录
+        
+        按页从新到旧读取：before_id 为空时返回最新的 limit 条，
+        否则返回 id 小于 before_id 的 limit 条。结果按时间正序排列。
+        """
         try:
-            query = """
-                SELECT * FROM messages 
-                WHERE contact_email = ?
-                ORDER BY sent_at ASC, created_at ASC
-                LIMIT ? OFFSET ?
-            """
-            rows = self.execute_query(query, (contact_email, limit, offset))
+            if before_id is None:
+                query = """
+                    SELECT * FROM messages 
+                    WHERE contact_email = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """
+                params = (contact_email, limit)
+            else:
+                query = """
+                    SELECT * FROM messages 
+                    WHERE contact_email = ? AND id < ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """
+                params = (contact_email, before_id, limit)
+            rows = self.execute_query(query, params)
             
             messages = []
-            for row in rows:
+            for row in reversed(rows):
                 message = dict(row)
                 message['is_read'] = bool(message['is_read'])
                 message['is_sent'] = bool(message['is_sent'])
@@ -543,8 +574,13 @@ class DatabaseManager:
     def backup_database(self, backup_path: str) -> bool:
         """备份数据库"""
         try:
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
+            # WAL模式下最新数据可能仍在 -wal 文件中，使用SQLite在线备份而非直接复制文件
+            with self.lock:
+                backup_conn = sqlite3.connect(backup_path)
+                try:
+                    self.connection.backup(backup_conn)
+                finally:
+                    backup_conn.close()
             print(f"✅ 数据库备份成功: {backup_path}")
             return True
         except Exception as e:
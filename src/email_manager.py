@@ -16,11 +16,14 @@ import socket
 import base64
 import binascii
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Callable, Tuple
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterator
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.parser import BytesHeaderParser
 import queue
 import json
+import logging
+import concurrent.futures
 
 # 导入项目模块
 from src.config_manager import ConfigManager
@@ -28,6 +31,11 @@ from src.database_manager import DatabaseManager
 from src.message_parser import message_parser
 from src.utils import DataValidator, SecurityUtils
 
+logger = logging.getLogger(__name__)
+
+# 仅解析邮件头的解析器，用于在完整解析前快速过滤非E-Chat邮件
+_header_parser = BytesHeaderParser()
+
 
 class EmailConnection:
     """邮件连接管理类"""
@@ -121,6 +129,34 @@ class SMTPConnection(EmailConnection):
 class IMAPConnection(EmailConnection):
     """IMAP连接管理"""
     
+    def __init__(self, server: str, port: int, use_ssl: bool = True, timeout: int = 30):
+        """初始化连接参数"""
+        super().__init__(server, port, use_ssl, timeout)
+        # 服务器能力（认证后对同一连接保持不变，只查询一次）
+        self.capabilities: frozenset = frozenset()
+    
+    def _load_capabilities(self):
+        """查询并缓存服务器CAPABILITY"""
+        try:
+            typ, data = self.connection.capability()
+            if typ == 'OK' and data and data[0]:
+                self.capabilities = frozenset(
+                    data[0].decode('utf-8', errors='ignore').upper().split()
+                )
+                return
+        except Exception as e:
+            print(f"⚠️ 获取服务器CAPABILITY失败: {e}")
+        
+        # 回退到imaplib在握手阶段获取的能力列表
+        self.capabilities = frozenset(
+            cap.upper() for cap in getattr(self.connection, 'capabilities', ())
+        )
+    
+    def disconnect(self):
+        """断开连接"""
+        super().disconnect()
+        self.capabilities = frozenset()
+    
     def connect(self, username: str, password: str) -> bool:
         """建立IMAP连接"""
         try:
@@ -133,13 +169,15 @@ class IMAPConnection(EmailConnection):
             # 登录
             self.connection.login(username, password)
             
+            # 认证后的能力列表在连接期间保持不变，缓存下来
+            self._load_capabilities()
+            
             # 针对126/163邮箱，发送ID信息以解决 "Unsafe Login" 问题
             # 参考: https://help.mail.163.com/faqDetail.do?code=d7a5dc8471cd0c0e8b4b8f4f8e49998b374173cfe9171305fa1ce630d7f67ac2eda07326646e6eb0
             if self.server.endswith(('126.com', '163.com')):
                 try:
                     # 检查服务器是否支持ID命令
-                    typ, caps = self.connection.capability()
-                    print(f"🔍 服务器CAPABILITY: {caps}")
+                    print(f"🔍 服务器CAPABILITY: {sorted(self.capabilities)}")
                     
                     # 对于126/163邮箱，强制发送ID，不管CAPABILITY怎么说
                     print("ℹ️ 检测到126/163邮箱，强制发送客户端ID信息...")
@@ -264,7 +302,9 @@ class EmailManager:
         # 连接管理
         self.smtp_connection = None
         self.imap_connection = None
-        self.connection_lock = threading.RLock()
+        # SMTP与IMAP连接相互独立，各用一把锁，允许并行建立连接
+        self.smtp_lock = threading.RLock()
+        self.imap_lock = threading.RLock()
         
         # 轮询控制
         self.polling_thread = None
@@ -365,7 +405,7 @@ class EmailManager:
     
     def connect_smtp(self) -> bool:
         """建立SMTP连接"""
-        with self.connection_lock:
+        with self.smtp_lock:
             try:
                 email_config = self.config_manager.get_email_config()
                 
@@ -408,7 +448,7 @@ class EmailManager:
     
     def connect_imap(self) -> bool:
         """建立IMAP连接"""
-        with self.connection_lock:
+        with self.imap_lock:
             try:
                 email_config = self.config_manager.get_email_config()
                 
@@ -451,12 +491,13 @@ class EmailManager:
     
     def disconnect_all(self):
         """断开所有连接"""
-        with self.connection_lock:
+        with self.smtp_lock:
             if self.smtp_connection:
                 self.smtp_connection.disconnect()
                 self.smtp_connection = None
                 self._notify_connection_status('smtp', False)
-            
+        
+        with self.imap_lock:
             if self.imap_connection:
                 self.imap_connection.disconnect()
                 self.imap_connection = None
@@ -541,11 +582,15 @@ class EmailManager:
                 # 获取配置
                 email_config = self.config_manager.get_email_config()
                 
-                # 创建邮件对象
-                email_msg = message_parser.create_email_message(message, email_config)
+                # 生成邮件报文（纯文本消息不经过MIME对象）
+                raw_email = message_parser.create_email_bytes(message, email_config)
                 
                 # 发送邮件
-                self.smtp_connection.connection.send_message(email_msg)
+                self.smtp_connection.connection.sendmail(
+                    email_config.get('username', message['sender']),
+                    [message['recipient']],
+                    raw_email
+                )
                 self.smtp_connection.update_last_used()
                 
                 # 更新统计
@@ -717,8 +762,9 @@ class EmailManager:
         """轮询工作线程"""
         while self.polling_running:
             try:
-                # 检查新邮件
-                self.check_new_messages()
+                # 检查新邮件（消息在获取时已保存并回调，这里逐封消费以限制内存占用）
+                for _ in self.check_new_messages():
+                    pass
                 
                 # 更新轮询时间
                 self.stats['last_poll_time'] = datetime.now()
@@ -767,7 +813,8 @@ class EmailManager:
                 if self._idle_listen():
                     # IDLE成功接收到更新，检查新邮件
                     print("📬 IDLE: 检测到邮件更新，正在检查新邮件...")
-                    self.check_new_messages()
+                    for _ in self.check_new_messages():
+                        pass
                 
                 # 每次IDLE结束后短暂等待
                 time.sleep(1)
@@ -867,10 +914,11 @@ class EmailManager:
             # 列出所有文件夹
             status, folders = self.imap_connection.connection.list()
             if status != 'OK':
-                print(f"❌ IMAP LIST 命令失败: {status}")
+                logger.error("IMAP LIST 命令失败: %s", status)
                 return []
             
             folder_names = []
+            seen = set()
             for folder in folders:
                 try:
                     # 解析文件夹名称
@@ -899,17 +947,18 @@ class EmailManager:
                     if not folder_name:
                         folder_name = folder_str.strip()
                     
-                    if folder_name and folder_name not in folder_names:
+                    if folder_name and folder_name not in seen:
+                        seen.add(folder_name)
                         folder_names.append(folder_name)
                         
                 except Exception as e:
-                    print(f"⚠️ 解析文件夹名称失败: {e}")
+                    logger.warning("解析文件夹名称失败: %s", e)
                     continue
             
             return folder_names
             
         except Exception as e:
-            print(f"❌ 列出文件夹失败: {e}")
+            logger.error("列出文件夹失败: %s", e)
             return []
 
     def _find_inbox_folder(self) -> Optional[str]:
@@ -921,18 +970,17 @@ class EmailManager:
             # 获取所有文件夹
             available_folders = self._list_imap_folders()
             if not available_folders:
-                print("❌ 无法获取文件夹列表")
+                logger.error("无法获取文件夹列表")
                 return None
             
-            print(f"🗂️ 可用文件夹列表: {available_folders}")
+            logger.debug("可用文件夹列表: %s", available_folders)
             
-            # 解码文件夹名并显示
-            decoded_folders = {}
-            for folder in available_folders:
-                decoded = self._decode_imap_utf7(folder)
-                decoded_folders[folder] = decoded
-                if folder != decoded:
-                    print(f"📁 {folder} -> {decoded}")
+            # 解码文件夹名并显示（仅在调试日志开启时才解码）
+            if logger.isEnabledFor(logging.DEBUG):
+                for folder in available_folders:
+                    decoded = self._decode_imap_utf7(folder)
+                    if folder != decoded:
+                        logger.debug("%s -> %s", folder, decoded)
             
             # 首先检查用户自定义的收件箱文件夹
             email_config = self.config_manager.get_email_config()
@@ -941,10 +989,10 @@ class EmailManager:
             if custom_inbox:
                 # 用户指定了自定义收件箱
                 if custom_inbox in available_folders:
-                    print(f"✅ 使用用户指定的收件箱: {custom_inbox}")
+                    logger.debug("使用用户指定的收件箱: %s", custom_inbox)
                     return custom_inbox
                 else:
-                    print(f"⚠️ 用户指定的收件箱文件夹不存在: {custom_inbox}")
+                    logger.warning("用户指定的收件箱文件夹不存在: %s", custom_inbox)
             
             # 自动查找收件箱 - 优先级列表
             priority_folders = [
@@ -952,90 +1000,93 @@ class EmailManager:
                 lambda f: self._decode_imap_utf7(f).lower() in ['收件箱', 'inbox', '邮箱'],
                 lambda f: 'inbox' in self._decode_imap_utf7(f).lower(),
                 lambda f: '收件' in self._decode_imap_utf7(f),
-                # 如果以上都没有，使用第一个文件夹
-                lambda f: True
             ]
             
             for priority in priority_folders:
                 if isinstance(priority, str):
                     # 直接匹配文件夹名
                     if priority in available_folders:
-                        print(f"✅ 自动选择收件箱: {priority}")
+                        logger.debug("自动选择收件箱: %s", priority)
                         return priority
                 else:
                     # 使用函数匹配
                     for folder in available_folders:
                         if priority(folder):
-                            decoded_name = self._decode_imap_utf7(folder)
-                            print(f"✅ 自动选择收件箱: {folder} ({decoded_name})")
+                            logger.debug("自动选择收件箱: %s (%s)", folder, self._decode_imap_utf7(folder))
                             return folder
             
-            return None
+            # 如果以上都没有，直接使用第一个文件夹
+            folder = available_folders[0]
+            logger.debug("未找到匹配的收件箱，使用第一个文件夹: %s", folder)
+            return folder
             
         except Exception as e:
-            print(f"❌ 查找收件箱文件夹失败: {e}")
+            logger.error("查找收件箱文件夹失败: %s", e)
             return None
 
-    def check_new_messages(self) -> List[Dict[str, Any]]:
-        """检查新邮件"""
+    def check_new_messages(self) -> Iterator[Dict[str, Any]]:
+        """检查新邮件
+        
+        以生成器形式逐封产出已解析的消息（获取、解析、保存和回调均已完成），
+        调用方迭代时上一封邮件的附件数据即可释放，峰值内存只与单封邮件大小相关。
+        """
         try:
             # 检查IMAP连接
             if not self.imap_connection or not self.imap_connection.is_alive():
                 if not self.connect_imap():
-                    return []
+                    return
             
             # 智能查找收件箱文件夹
             inbox_folder = self._find_inbox_folder()
             if not inbox_folder:
-                print("❌ 无法找到合适的收件箱文件夹")
-                return []
+                logger.error("无法找到合适的收件箱文件夹")
+                return
             
             # 选择文件夹
             try:
                 select_status, select_data = self.imap_connection.connection.select(inbox_folder)
                 if select_status != 'OK':
-                    print(f"❌ 选择文件夹失败: {inbox_folder} - {select_status}")
-                    return []
+                    logger.error("选择文件夹失败: %s - %s", inbox_folder, select_status)
+                    return
                 
                 msg_count = select_data[0].decode() if select_data else "0"
-                print(f"✅ 成功选择文件夹: {inbox_folder} ({msg_count} 条消息)")
+                logger.debug("成功选择文件夹: %s (%s 条消息)", inbox_folder, msg_count)
                 
             except Exception as e:
-                print(f"❌ 选择文件夹 '{inbox_folder}' 失败: {e}")
-                return []
+                logger.error("选择文件夹 '%s' 失败: %s", inbox_folder, e)
+                return
             
             # 搜索未读邮件
             status, message_ids = self.imap_connection.connection.search(None, 'UNSEEN')
             
             if status != 'OK':
-                print("❌ 搜索邮件失败")
-                return []
+                logger.error("搜索邮件失败")
+                return
             
-            new_messages = []
+            received_count = 0
             
-            for msg_id in message_ids[0].split():
-                try:
-                    # 获取邮件
-                    message_data = self._fetch_email(msg_id)
+            try:
+                for msg_id in message_ids[0].split():
+                    try:
+                        # 获取邮件
+                        message_data = self._fetch_email(msg_id)
+                    except Exception as e:
+                        logger.error("处理邮件失败: %s", e)
+                        continue
+                    
                     if message_data:
-                        new_messages.append(message_data)
-                        
-                except Exception as e:
-                    print(f"❌ 处理邮件失败: {e}")
-                    continue
-            
-            self.imap_connection.update_last_used()
-            
-            if new_messages:
-                print(f"📬 收到 {len(new_messages)} 封新邮件")
-                self.stats['messages_received'] += len(new_messages)
-            
-            return new_messages
+                        received_count += 1
+                        yield message_data
+            finally:
+                self.imap_connection.update_last_used()
+                
+                if received_count:
+                    logger.info("收到 %d 封新邮件", received_count)
+                    self.stats['messages_received'] += received_count
             
         except Exception as e:
-            print(f"❌ 检查新邮件失败: {e}")
+            logger.error("检查新邮件失败: %s", e)
             self.stats['errors'] += 1
-            return []
     
     def _fetch_email(self, msg_id: bytes) -> Optional[Dict[str, Any]]:
         """获取单封邮件"""
@@ -1046,15 +1097,17 @@ class EmailManager:
             if status != 'OK':
                 return None
             
-            # 解析邮件
-            email_msg = email.message_from_bytes(msg_data[0][1])
+            raw_email = msg_data[0][1]
             
-            # 检查是否为E-Chat消息
-            subject = email_msg.get('Subject', '')
+            # 检查是否为E-Chat消息（只解析邮件头，非E-Chat邮件无需完整解析MIME结构）
+            subject = _header_parser.parsebytes(raw_email).get('Subject', '')
             if not message_parser.is_echat_message(subject):
-                print(f"⚠️ 跳过非E-Chat邮件: {subject}")
+                logger.debug("跳过非E-Chat邮件: %s", subject)
                 return None
             
+            # 解析邮件
+            email_msg = email.message_from_bytes(raw_email)
+            
             # 解析邮件内容
             sender = email_msg.get('From', '')
             recipient = email_msg.get('To', '')
@@ -1066,12 +1119,15 @@ class EmailManager:
             parsed_message = message_parser.parse_message_body(body)
             
             if not parsed_message:
-                print("❌ 消息解析失败")
+                logger.error("消息解析失败")
                 return None
             
             # 提取附件
             attachments = message_parser.extract_attachments_from_email(email_msg)
             
+            # 原始邮件数据已不再需要，尽早释放
+            del email_msg, msg_data, raw_email
+            
             # 合并附件信息
             if attachments:
                 parsed_message = message_parser.merge_message_with_attachments(parsed_message, attachments)
@@ -1090,12 +1146,12 @@ class EmailManager:
                 try:
                     self.message_received_callback(parsed_message)
                 except Exception as e:
-                    print(f"❌ 消息接收回调执行失败: {e}")
+                    logger.error("消息接收回调执行失败: %s", e)
             
             return parsed_message
             
         except Exception as e:
-            print(f"❌ 获取邮件失败: {e}")
+            logger.error("获取邮件失败: %s", e)
             return None
     
     def _extract_email_body(self, email_msg) -> str:
@@ -1172,9 +1228,14 @@ class EmailManager:
             'imap': {'success': False, 'error': None, 'folders': []}
         }
         
+        # SMTP与IMAP连接互不依赖，并行测试，总耗时取两者中较慢的一个
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            smtp_future = executor.submit(self.connect_smtp)
+            imap_future = executor.submit(self.connect_imap)
+        
         # 测试SMTP
         try:
-            if self.connect_smtp():
+            if smtp_future.result():
                 results['smtp']['success'] = True
             else:
                 results['smtp']['error'] = "连接失败"
@@ -1183,7 +1244,7 @@ class EmailManager:
         
         # 测试IMAP
         try:
-            if self.connect_imap():
+            if imap_future.result():
                 results['imap']['success'] = True
                 # 列出可用文件夹
                 folders = self._list_imap_folders()
@@ -1208,16 +1269,10 @@ class EmailManager:
                     self.idle_supported = False
                     return False
             
-            # 检查服务器能力
+            # 检查服务器能力（连接建立时已缓存）
             try:
-                typ, data = self.imap_connection.connection.capability()
-                if typ != 'OK':
-                    print(f"❌ 获取服务器能力失败: {typ}")
-                    self.idle_supported = False
-                    return False
-                
-                capabilities = data[0].decode('utf-8', errors='ignore').upper()
-                print(f"📋 服务器能力: {capabilities}")
+                capabilities = self.imap_connection.capabilities
+                print(f"📋 服务器能力: {' '.join(sorted(capabilities))}")
                 
                 if 'IDLE' in capabilities:
                     print("✅ 服务器支持IDLE命令")
@@ -1275,27 +1330,31 @@ class EmailManager:
             print("📤 发送IDLE命令进行测试...")
             self.imap_connection.connection.sock.send(command.encode('utf-8'))
             
-            # 读取响应（设置超时）
-            self.imap_connection.connection.sock.settimeout(5)
-            response = self.imap_connection.connection.sock.recv(1024).decode('utf-8')
-            print(f"📥 IDLE响应: {response.strip()}")
+            # 读取响应（设置超时），复用同一缓冲区，直接在字节上判断，避免非UTF-8响应导致解码异常
+            sock = self.imap_connection.connection.sock
+            buf = bytearray(1024)
+            sock.settimeout(5)
+            n = sock.recv_into(buf)
+            response = bytes(buf[:n])
+            print(f"📥 IDLE响应: {response.strip()!r}")
             
             # 检查响应是否表明IDLE开始
-            if '+ idling' in response.lower() or '+ waiting' in response.lower():
+            lowered = response.lower()
+            if b'+ idling' in lowered or b'+ waiting' in lowered:
                 print("✅ IDLE命令启动成功")
                 
                 # 立即发送DONE结束IDLE
-                self.imap_connection.connection.sock.send(b'DONE\r\n')
-                response = self.imap_connection.connection.sock.recv(1024).decode('utf-8')
-                print(f"📥 DONE响应: {response.strip()}")
+                sock.send(b'DONE\r\n')
+                n = sock.recv_into(buf)
+                print(f"📥 DONE响应: {bytes(buf[:n]).strip()!r}")
                 
                 # 重置超时
-                self.imap_connection.connection.sock.settimeout(None)
+                sock.settimeout(None)
                 return True
             else:
-                print(f"❌ IDLE命令未正确启动: {response}")
+                print(f"❌ IDLE命令未正确启动: {response!r}")
                 # 重置超时
-                self.imap_connection.connection.sock.settimeout(None)
+                sock.settimeout(None)
                 return False
                 
         except Exception as e:
@@ -1322,22 +1381,76 @@ class EmailManager:
             for i, folder in enumerate(folders, 1):
                 print(f"  {i}. '{folder}'")
             
-            # 尝试选择每个文件夹
-            print("\n🧪 测试文件夹选择:")
+            # 获取每个文件夹的消息数（STATUS不会打开文件夹，比逐个SELECT更轻量）
+            print("\n🧪 测试文件夹状态:")
+            counts = self._get_folder_message_counts(folders)
             for folder in folders:
-                try:
-                    status, data = self.imap_connection.connection.select(folder)
-                    if status == 'OK':
-                        msg_count = data[0].decode() if data else "未知"
-                        print(f"  ✅ '{folder}' - 可选择 ({msg_count} 条消息)")
-                    else:
-                        print(f"  ❌ '{folder}' - 选择失败: {status}")
-                except Exception as e:
-                    print(f"  ❌ '{folder}' - 异常: {e}")
+                msg_count = counts.get(folder)
+                if msg_count is not None:
+                    print(f"  ✅ '{folder}' - 可访问 ({msg_count} 条消息)")
+                else:
+                    print(f"  ❌ '{folder}' - 无法获取状态")
             
         except Exception as e:
             print(f"❌ 调试IMAP文件夹失败: {e}")
     
+    def _get_folder_message_counts(self, folders: List[str]) -> Dict[str, int]:
+        """获取文件夹消息数
+        
+        服务器支持LIST-STATUS (RFC 5819) 时一次往返取回全部文件夹状态，
+        否则对每个文件夹发送STATUS命令。
+        """
+        connection = self.imap_connection.connection
+        counts = {}
+        
+        if 'LIST-STATUS' in self.imap_connection.capabilities:
+            try:
+                connection.response('STATUS')  # 清除之前残留的STATUS响应
+                typ, _ = connection.xatom('LIST', '""', '"*"', 'RETURN', '(STATUS (MESSAGES))')
+                # 取出本次命令附带的未标记响应：STATUS 用于统计，LIST 直接丢弃
+                _, data = connection.response('STATUS')
+                connection.response('LIST')
+                if typ == 'OK':
+                    for item in data:
+                        parsed = self._parse_status_response(item)
+                        if parsed:
+                            counts[parsed[0]] = parsed[1]
+                    return counts
+            except Exception as e:
+                print(f"⚠️ LIST-STATUS 失败，改用逐个STATUS: {e}")
+        
+        for folder in folders:
+            try:
+                quoted = '"' + folder.replace('\\', '\\\\').replace('"', '\\"') + '"'
+                typ, data = connection.status(quoted, '(MESSAGES)')
+                if typ == 'OK' and data:
+                    parsed = self._parse_status_response(data[0])
+                    if parsed:
+                        counts[folder] = parsed[1]
+            except Exception as e:
+                print(f"  ❌ '{folder}' - STATUS异常: {e}")
+        
+        return counts
+    
+    @staticmethod
+    def _parse_status_response(item) -> Optional[Tuple[str, int]]:
+        """解析STATUS响应，如 b'"INBOX" (MESSAGES 12)'"""
+        if isinstance(item, bytes):
+            item = item.decode('utf-8', errors='ignore')
+        if not item or '(' not in item:
+            return None
+        
+        name, _, attrs = item.rpartition('(')
+        name = name.strip()
+        if len(name) >= 2 and name[0] == name[-1] == '"':
+            name = name[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+        
+        tokens = attrs.rstrip(')').split()
+        for key, value in zip(tokens[::2], tokens[1::2]):
+            if key.upper() == 'MESSAGES' and value.isdigit():
+                return name, int(value)
+        return None
+    
     def cleanup(self):
         """清理资源"""
         print("🔄 正在清理邮件管理器...")
@@ -7,18 +7,40 @@ E-Chat 消息解析模块
 """
 
 import json
-import re
+from types import MappingProxyType
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-import base64
-import uuid
+from typing import Dict, Any, Optional, List, Tuple, Union, BinaryIO, TYPE_CHECKING
+
+# email.mime.* 只在构造multipart邮件时才需要，运行时在使用处按需导入
+if TYPE_CHECKING:
+    from email.mime.multipart import MIMEMultipart
+
+# 优先使用SIMD加速的pybase64（接口与标准库一致），未安装时回退到标准库
+try:
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+_b64encode = _b64.b64encode
+_b64decode = _b64.b64decode
+
+# 可选的C实现ISO 8601解析器，未安装时回退到标准库
+try:
+    from ciso8601 import parse_datetime as _parse_iso_datetime
+except ImportError:
+    _parse_iso_datetime = datetime.fromisoformat
 
 # 导入工具类
-from src.utils import MessageUtils, SecurityUtils, DataValidator
+from src.utils import (
+    MessageUtils, SecurityUtils, DataValidator, FormatUtils,
+    compact_json_dumps, compact_timestamp, iso_timestamp, format_time
+)
+
+# 共享的JSON解码器，parse_message_body 用它从正文中的指定位置直接解析
+_JSON_DECODER = json.JSONDecoder()
+
+# 降级消息（非E-Chat邮件）共用的只读客户端信息
+_UNKNOWN_CLIENT_INFO = MappingProxyType({"app": "Unknown", "version": "Unknown"})
 
 
 class MessageParser:
@@ -28,10 +50,13 @@ class MessageParser:
     MESSAGE_VERSION = "1.0"
     
     # E-Chat邮件主题前缀
-    SUBJECT_PREFIX = "[E-Chat]"
+    SUBJECT_PREFIX = MessageUtils.SUBJECT_PREFIX
     
     # 支持的消息类型
     MESSAGE_TYPES = ["text", "file", "image", "status", "system"]
+    # 校验用的集合形式：消息类型 / 必需字段
+    _MESSAGE_TYPE_SET = frozenset(MESSAGE_TYPES)
+    _REQUIRED_FIELDS = frozenset(("version", "type", "content"))
     
     def __init__(self):
         """初始化消息解析器"""
@@ -40,6 +65,8 @@ class MessageParser:
             "version": "1.0.0",
             "protocol_version": self.MESSAGE_VERSION
         }
+        # 所有新建消息共享的只读客户端信息，避免每条消息复制一份
+        self._client_info = MappingProxyType(self.app_info)
         
         print("📧 消息解析器初始化完成")
     
@@ -50,18 +77,24 @@ class MessageParser:
         return self._create_base_message(sender, recipient, "text", {"text": content})
     
     def create_file_message(self, sender: str, recipient: str, content: str, 
-                          file_name: str, file_size: int, file_data: bytes = None) -> Dict[str, Any]:
-        """创建文件消息"""
+                          file_name: str, file_size: int,
+                          file_data: Union[bytes, BinaryIO] = None) -> Dict[str, Any]:
+        """创建文件消息
+        
+        file_data 可以是字节或可读的二进制文件对象。原始字节保存在 _raw_file_data 中，
+        直到作为附件写入邮件时才由MIME编码器做唯一一次base64编码。
+        """
         file_content = {
             "text": content,
             "file_name": file_name,
             "file_size": file_size
         }
         
-        # 如果有文件数据，进行base64编码
+        if file_data is not None and hasattr(file_data, 'read'):
+            file_data = file_data.read()
+        
         if file_data:
-            file_content["file_data"] = base64.b64encode(file_data).decode('utf-8')
-            file_content["encoding"] = "base64"
+            file_content["_raw_file_data"] = file_data
         
         return self._create_base_message(sender, recipient, "file", file_content)
     
@@ -70,7 +103,7 @@ class MessageParser:
         """创建状态消息（在线/离线/正在输入等）"""
         status_content = {
             "status_type": status_type,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_timestamp()
         }
         
         if status_data:
@@ -88,7 +121,7 @@ class MessageParser:
         if not DataValidator.validate_email(recipient):
             raise ValueError(f"接收者邮箱格式无效: {recipient}")
         
-        if message_type not in self.MESSAGE_TYPES:
+        if message_type not in self._MESSAGE_TYPE_SET:
             raise ValueError(f"不支持的消息类型: {message_type}")
         
         # 创建消息
@@ -98,9 +131,9 @@ class MessageParser:
             "type": message_type,
             "sender": sender,
             "recipient": recipient,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_timestamp(),
             "content": content,
-            "client_info": self.app_info.copy()
+            "client_info": self._client_info
         }
         
         return message
@@ -110,7 +143,8 @@ class MessageParser:
     def format_email_subject(self, message: Dict[str, Any]) -> str:
         """格式化邮件主题"""
         message_type = message.get("type", "text")
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        # 复用消息自身的时间戳，保证主题与正文时间一致
+        timestamp = compact_timestamp(message.get("timestamp"))
         message_id = message.get("message_id", "unknown")
         
         # 提取消息ID的后8位
@@ -120,8 +154,11 @@ class MessageParser:
         
         return subject
     
-    def create_email_message(self, message: Dict[str, Any], smtp_config: Dict[str, Any]) -> MIMEMultipart:
+    def create_email_message(self, message: Dict[str, Any], smtp_config: Dict[str, Any]) -> 'MIMEMultipart':
         """创建邮件消息对象"""
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        
         try:
             # 创建邮件对象
             email_msg = MIMEMultipart()
@@ -144,7 +181,7 @@ class MessageParser:
             email_msg.attach(text_part)
             
             # 如果是文件消息且包含文件数据，添加附件
-            if message['type'] == 'file' and 'file_data' in message['content']:
+            if message['type'] == 'file' and self._has_file_data(message['content']):
                 self._attach_file_to_email(email_msg, message)
             
             return email_msg
@@ -152,23 +189,73 @@ class MessageParser:
         except Exception as e:
             raise Exception(f"创建邮件消息失败: {e}")
     
+    def create_email_bytes(self, message: Dict[str, Any], smtp_config: Dict[str, Any]) -> bytes:
+        """生成可直接交给 SMTP 发送的邮件字节
+        
+        纯文本消息（最常见的情况）直接拼接RFC 5322报文，不构造MIME对象树；
+        带附件的文件消息仍通过 create_email_message 生成 multipart 邮件；
+        头部含非ASCII字符（如国际化邮箱地址）时也走该路径，由 email 包负责 RFC 2047 编码。
+        """
+        header_values = (
+            str(smtp_config.get('username', message['sender'])),
+            str(message['recipient']),
+            str(message['type']),
+            str(message['message_id']),
+        )
+        # 头部值中的换行会被当作新的邮件头，直接拒绝以防头部注入
+        if any('\r' in value or '\n' in value for value in header_values):
+            raise Exception("创建邮件消息失败: 邮件头包含换行符")
+        
+        if ((message['type'] == 'file' and self._has_file_data(message['content']))
+                or not all(value.isascii() for value in header_values)):
+            return self.create_email_message(message, smtp_config).as_bytes()
+        return self._build_plain_rfc5322(message, header_values)
+    
+    def _build_plain_rfc5322(self, message: Dict[str, Any],
+                             header_values: Tuple[str, str, str, str]) -> bytes:
+        """直接拼接单一 text/plain 部分的邮件报文（头部与 create_email_message 一致）
+        
+        header_values 为已检查过的纯ASCII、不含换行的 (From, To, 类型, 消息ID)。
+        """
+        sender, recipient, message_type, message_id = header_values
+        try:
+            body = _b64encode(self.format_message_body(message).encode('utf-8'))
+            # 按RFC 2045每行不超过76个字符
+            body_lines = [body[i:i + 76] for i in range(0, len(body), 76)]
+            
+            headers = (
+                f"From: {sender}\r\n"
+                f"To: {recipient}\r\n"
+                f"Subject: {self.format_email_subject(message)}\r\n"
+                f"X-E-Chat-Version: {self.MESSAGE_VERSION}\r\n"
+                f"X-E-Chat-Type: {message_type}\r\n"
+                f"X-E-Chat-Message-ID: {message_id}\r\n"
+                "MIME-Version: 1.0\r\n"
+                'Content-Type: text/plain; charset="utf-8"\r\n'
+                "Content-Transfer-Encoding: base64\r\n"
+                "\r\n"
+            )
+            
+            return headers.encode('ascii') + b"\r\n".join(body_lines) + b"\r\n"
+            
+        except Exception as e:
+            raise Exception(f"创建邮件消息失败: {e}")
+    
     def format_message_body(self, message: Dict[str, Any]) -> str:
         """格式化消息体为JSON字符串"""
         try:
-            # 创建消息体的副本，移除可能很大的文件数据
-            body_message = message.copy()
-            
-            # 如果是文件消息，处理文件数据
-            if message['type'] == 'file' and 'file_data' in message['content']:
-                # 不在邮件正文中包含文件数据，而是作为附件
-                body_content = body_message['content'].copy()
-                if 'file_data' in body_content:
-                    body_content['has_attachment'] = True
-                    del body_content['file_data']  # 移除大数据，避免邮件正文过大
-                body_message['content'] = body_content
+            # 如果是文件消息，不在邮件正文中包含文件数据，而是作为附件；
+            # 只有这种情况才需要构造副本，其他消息直接序列化原对象
+            if message['type'] == 'file' and self._has_file_data(message['content']):
+                body_content = {k: v for k, v in message['content'].items()
+                                if k not in self._FILE_DATA_KEYS}
+                body_content['has_attachment'] = True
+                body_message = {**message, 'content': body_content}
+            else:
+                body_message = message
             
-            # 格式化为JSON
-            json_body = json.dumps(body_message, ensure_ascii=False, indent=2)
+            # 格式化为紧凑JSON（邮件正文不需要缩进，体积约减半）
+            json_body = compact_json_dumps(body_message)
             
             # 添加人类可读的头部信息
             readable_header = f"""
@@ -188,18 +275,29 @@ Raw Message Data:
         except Exception as e:
             raise Exception(f"格式化消息体失败: {e}")
     
-    def _attach_file_to_email(self, email_msg: MIMEMultipart, message: Dict[str, Any]):
+    # 消息内容中可能携带文件数据的字段：原始字节 / base64文本
+    _FILE_DATA_KEYS = ('_raw_file_data', 'file_data')
+    
+    def _has_file_data(self, content: Dict[str, Any]) -> bool:
+        """检查消息内容是否携带文件数据"""
+        return any(key in content for key in self._FILE_DATA_KEYS)
+    
+    def _attach_file_to_email(self, email_msg: 'MIMEMultipart', message: Dict[str, Any]):
         """将文件附加到邮件"""
+        from email.mime.base import MIMEBase
+        from email import encoders
+        
         try:
             content = message['content']
             file_name = content.get('file_name', 'attachment')
-            file_data = content.get('file_data', '')
-            
-            if not file_data:
-                return
-            
-            # 解码base64文件数据
-            file_bytes = base64.b64decode(file_data.encode('utf-8'))
+            # 本地创建的文件消息直接携带原始字节；
+            # 接收后合并附件得到的消息则携带base64文本，需要先解码
+            file_bytes = content.get('_raw_file_data')
+            if file_bytes is None:
+                file_data = content.get('file_data', '')
+                if not file_data:
+                    return
+                file_bytes = _b64decode(file_data)
             
             # 创建附件
             attachment = MIMEBase('application', 'octet-stream')
@@ -226,19 +324,7 @@ Raw Message Data:
     
     def parse_email_subject(self, subject: str) -> Dict[str, str]:
         """解析邮件主题"""
-        if not self.is_echat_message(subject):
-            return {}
-        
-        try:
-            # 移除前缀
-            content = subject[len(self.SUBJECT_PREFIX):].strip()
-            
-            # 使用工具函数解析
-            return MessageUtils.parse_email_subject(self.SUBJECT_PREFIX + " " + content)
-            
-        except Exception as e:
-            print(f"❌ 解析邮件主题失败: {e}")
-            return {}
+        return MessageUtils.parse_email_subject(subject)
     
     def parse_message_body(self, body: str) -> Optional[Dict[str, Any]]:
         """解析消息体"""
@@ -249,13 +335,14 @@ Raw Message Data:
                 # 如果没找到JSON，当作普通文本处理
                 return self._create_fallback_message(body)
             
-            json_part = body[json_start:]
-            
-            # 尝试解析JSON
-            message_data = json.loads(json_part)
+            # 从JSON起始位置原地解析，不复制正文尾部
+            message_data, _ = _JSON_DECODER.raw_decode(body, json_start)
             
             # 验证消息格式
             if self._validate_message_format(message_data):
+                # 与本客户端相同的 client_info 改为引用共享的只读实例，不再每条消息各持一份
+                if message_data.get('client_info') == self.app_info:
+                    message_data['client_info'] = self._client_info
                 return message_data
             else:
                 print("⚠️ 消息格式验证失败，当作普通文本处理")
@@ -276,25 +363,21 @@ Raw Message Data:
             "content": {
                 "text": body.strip()
             },
-            "client_info": {
-                "app": "Unknown",
-                "version": "Unknown"
-            },
+            "client_info": _UNKNOWN_CLIENT_INFO,
             "fallback": True  # 标记为降级消息
         }
     
     def _validate_message_format(self, message: Dict[str, Any]) -> bool:
         """验证消息格式"""
-        required_fields = ["version", "type", "content"]
-        
-        for field in required_fields:
-            if field not in message:
-                print(f"⚠️ 缺少必需字段: {field}")
-                return False
+        missing = self._REQUIRED_FIELDS - message.keys()
+        if missing:
+            print(f"⚠️ 缺少必需字段: {', '.join(sorted(missing))}")
+            return False
         
-        # 验证消息类型
-        if message["type"] not in self.MESSAGE_TYPES:
-            print(f"⚠️ 不支持的消息类型: {message['type']}")
+        # 验证消息类型（JSON中可能出现不可哈希的值，先确认是字符串）
+        message_type = message["type"]
+        if not isinstance(message_type, str) or message_type not in self._MESSAGE_TYPE_SET:
+            print(f"⚠️ 不支持的消息类型: {message_type}")
             return False
         
         # 验证内容结构
@@ -309,20 +392,32 @@ Raw Message Data:
         attachments = []
         
         try:
-            for part in email_msg.walk():
-                if part.get_content_disposition() == 'attachment':
-                    filename = part.get_filename()
-                    if filename:
-                        # 获取文件数据
-                        file_data = part.get_payload(decode=True)
-                        
-                        attachment_info = {
-                            "filename": SecurityUtils.sanitize_filename(filename),
-                            "size": len(file_data) if file_data else 0,
-                            "data": base64.b64encode(file_data).decode('utf-8') if file_data else ""
-                        }
-                        
-                        attachments.append(attachment_info)
+            # 显式栈遍历MIME树：只展开multipart容器，逆序压栈以保持附件原有顺序
+            stack = [email_msg]
+            while stack:
+                part = stack.pop()
+                if part.is_multipart():
+                    stack.extend(reversed(part.get_payload()))
+                    continue
+                
+                if part.get_content_disposition() != 'attachment':
+                    continue
+                
+                # 先检查文件名，没有文件名的附件不必解码
+                filename = part.get_filename()
+                if not filename:
+                    continue
+                
+                # 获取文件数据
+                file_data = part.get_payload(decode=True)
+                
+                attachment_info = {
+                    "filename": SecurityUtils.sanitize_filename(filename),
+                    "size": len(file_data) if file_data else 0,
+                    "data": _b64encode(file_data).decode('ascii') if file_data else ""
+                }
+                
+                attachments.append(attachment_info)
         
         except Exception as e:
             print(f"❌ 提取附件失败: {e}")
@@ -391,7 +486,6 @@ Raw Message Data:
             elif message_type == 'file':
                 file_name = content.get('file_name', '未知文件')
                 file_size = content.get('file_size', 0)
-                from src.utils import FormatUtils
                 size_str = FormatUtils.format_file_size(file_size)
                 return f"📎 {file_name} ({size_str})"
             
@@ -410,8 +504,9 @@ Raw Message Data:
         try:
             timestamp_str = message.get('timestamp', '')
             if timestamp_str:
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                from src.utils import format_time
+                if timestamp_str.endswith('Z'):
+                    timestamp_str = timestamp_str[:-1] + '+00:00'
+                timestamp = _parse_iso_datetime(timestamp_str)
                 return format_time(timestamp)
             else:
                 return datetime.now().strftime("%H:%M")
@@ -424,20 +519,19 @@ Raw Message Data:
         if not attachments:
             return message
         
-        # 创建消息副本
-        merged_message = message.copy()
-        
-        # 如果是文件消息，合并附件数据
-        if message['type'] == 'file' and attachments:
+        # 一次性构造合并后的消息，不修改调用方持有的 content
+        if message['type'] == 'file':
             attachment = attachments[0]  # 假设只有一个附件
-            merged_message['content'].update({
+            content = {
+                **message['content'],
                 'file_data': attachment['data'],
                 'file_size': attachment['size'],
                 'encoding': 'base64'
-            })
+            }
+        else:
+            content = message['content']
         
-        # 添加附件列表
-        merged_message['attachments'] = attachments
+        merged_message = {**message, 'content': content, 'attachments': attachments}
         
         return merged_message
     
@@ -451,10 +545,17 @@ Raw Message Data:
             "app_info": self.app_info
         }
     
+    @staticmethod
+    def _debug_json_default(obj: Any) -> Any:
+        """调试输出时的序列化兜底：文件原始字节只显示长度，只读映射转为dict"""
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return f"<{len(obj)} bytes>"
+        return dict(obj)
+    
     def debug_message_structure(self, message: Dict[str, Any]) -> str:
         """调试消息结构"""
         try:
-            return json.dumps(message, ensure_ascii=False, indent=2)
+            return json.dumps(message, ensure_ascii=False, indent=2, default=self._debug_json_default)
         except Exception as e:
             return f"Debug失败: {e}"
 
@@ -8,12 +8,87 @@ E-Chat 工具函数和数据验证模块
 
 import re
 import hashlib
+import itertools
+import os
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 from pathlib import Path
 import json
-import base64
+
+# 可选的RE2线性时间正则引擎（google-re2，接口与 re 一致），未安装时回退到标准库
+try:
+    import re2 as _fast_re
+except ImportError:
+    _fast_re = re
+
+# 优先使用SIMD加速的pybase64（接口与标准库一致），未安装时回退到标准库
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+
+# 可选的高性能JSON库，未安装时回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 文件大小单位（按1024进位）
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# 最近一次生成的秒级ISO时间戳缓存：(整秒, 字符串)，同一秒内的消息直接复用
+_iso_cache: Tuple[int, str] = (-1, "")
+
+
+def iso_timestamp() -> str:
+    """返回当前本地时间的ISO 8601字符串（精确到秒）
+    
+    同一秒内重复调用时复用上次格式化的结果，避免每条消息都构造datetime对象。
+    """
+    global _iso_cache
+    sec = int(time.time())
+    cached_sec, cached_str = _iso_cache
+    if sec != cached_sec:
+        cached_str = datetime.fromtimestamp(sec).isoformat()
+        _iso_cache = (sec, cached_str)
+    return cached_str
+
+
+def compact_timestamp(iso_str: str = None) -> str:
+    """将ISO时间戳（YYYY-MM-DDTHH:MM:SS...）切片为 YYYYMMDDHHMMSS，缺省时取当前时间"""
+    ts = iso_str or iso_timestamp()
+    return ts[:4] + ts[5:7] + ts[8:10] + ts[11:13] + ts[14:16] + ts[17:19]
+
+
+# 消息ID尾部的进程内计数器，保证同一秒内连续生成的ID互不相同
+_message_id_counter = itertools.count()
+
+
+def _json_default(obj: Any) -> Any:
+    """序列化标准库不支持的映射类型（如 MappingProxyType）"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compact_json_dumps(obj: Any) -> str:
+    """以紧凑格式序列化为JSON字符串，非ASCII字符原样保留"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+# 预编译的正则表达式
+_EMAIL_RE = _fast_re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_NICK_BAD_RE = _fast_re.compile(r'[<>"\\/|?*]')
+# RE2 的 \s 只匹配ASCII空白，空白折叠保留标准库以兼容全角空格等Unicode空白
+_WS_RE = re.compile(r'\s+')
+# 文件名中的危险字符统一替换为下划线（str.translate 查表替换）
+_FNAME_TRANS = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
 
 
 class DataValidator:
@@ -25,9 +100,7 @@ class DataValidator:
         if not email or not isinstance(email, str):
             return False
         
-        # 邮箱正则表达式
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email.strip()))
+        return bool(_EMAIL_RE.match(email.strip()))
     
     @staticmethod
     def validate_password(password: str, min_length: int = 6) -> Tuple[bool, str]:
@@ -107,7 +180,7 @@ class DataValidator:
             return False, "昵称长度不能超过50个字符"
         
         # 检查特殊字符
-        if re.search(r'[<>"\\/|?*]', nickname):
+        if _NICK_BAD_RE.search(nickname):
             return False, "昵称包含非法字符"
         
         return True, "昵称格式正确"
@@ -119,18 +192,13 @@ class FormatUtils:
     @staticmethod
     def format_file_size(size_bytes: int) -> str:
         """格式化文件大小"""
-        if size_bytes == 0:
+        size_bytes = int(size_bytes)
+        if size_bytes <= 0:
             return "0 B"
         
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        i = 0
-        size = float(size_bytes)
-        
-        while size >= 1024.0 and i < len(size_names) - 1:
-            size /= 1024.0
-            i += 1
-        
-        return f"{size:.1f} {size_names[i]}"
+        # 每1024倍进一个单位，单位序号即二进制位数除以10
+        unit = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (unit * 10)):.1f} {_SIZE_UNITS[unit]}"
     
     @staticmethod
     def format_timestamp(timestamp: datetime, format_type: str = 'auto') -> str:
@@ -171,7 +239,7 @@ class FormatUtils:
             return ""
         
         # 移除换行符和多余空格
-        cleaned = re.sub(r'\s+', ' ', message.strip())
+        cleaned = _WS_RE.sub(' ', message.strip())
         
         if len(cleaned) <= max_length:
             return cleaned
@@ -194,12 +262,16 @@ class FormatUtils:
 class MessageUtils:
     """消息处理工具类"""
     
+    # E-Chat 邮件主题前缀
+    SUBJECT_PREFIX = "[E-Chat]"
+    _PREFIX_LEN = len(SUBJECT_PREFIX)
+    
     @staticmethod
     def generate_message_id() -> str:
         """生成唯一消息ID"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        unique_id = uuid.uuid4().hex[:8]
-        return f"echat_{timestamp}_{unique_id}"
+        # 3字节随机数 + 1字节计数器，共8位十六进制
+        unique_id = f"{os.urandom(3).hex()}{next(_message_id_counter) & 0xFF:02x}"
+        return f"echat_{compact_timestamp()}_{unique_id}"
     
     @staticmethod
     def create_email_subject(message_type: str = "text", extra_info: str = "") -> str:
@@ -207,7 +279,7 @@ class MessageUtils:
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         random_id = uuid.uuid4().hex[:6]
         
-        subject = f"[E-Chat] {message_type}_{timestamp}_{random_id}"
+        subject = f"{MessageUtils.SUBJECT_PREFIX} {message_type}_{timestamp}_{random_id}"
         
         if extra_info:
             subject += f"_{extra_info}"
@@ -217,23 +289,19 @@ class MessageUtils:
     @staticmethod
     def parse_email_subject(subject: str) -> Dict[str, str]:
         """解析邮件主题"""
-        if not subject.startswith("[E-Chat]"):
+        if not subject.startswith(MessageUtils.SUBJECT_PREFIX):
             return {}
         
-        try:
-            # 移除前缀
-            content = subject[9:].strip()
-            parts = content.split('_')
-            
-            if len(parts) >= 3:
-                return {
-                    'message_type': parts[0],
-                    'timestamp': parts[1],
-                    'random_id': parts[2],
-                    'extra_info': '_'.join(parts[3:]) if len(parts) > 3 else ''
-                }
-        except Exception:
-            pass
+        # 移除前缀；最多切分3次，extra_info 中的下划线原样保留
+        parts = subject[MessageUtils._PREFIX_LEN:].strip().split('_', 3)
+        
+        if len(parts) >= 3:
+            return {
+                'message_type': parts[0],
+                'timestamp': parts[1],
+                'random_id': parts[2],
+                'extra_info': parts[3] if len(parts) > 3 else ''
+            }
         
         return {}
     
@@ -246,7 +314,7 @@ class MessageUtils:
             "type": message_type,
             "sender": sender,
             "recipient": recipient,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_timestamp(),
             "content": {
                 "text": content
             },
@@ -259,7 +327,7 @@ class MessageUtils:
         if attachment_info:
             message_data["content"].update(attachment_info)
         
-        return json.dumps(message_data, ensure_ascii=False, indent=2)
+        return compact_json_dumps(message_data)
     
     @staticmethod
     def parse_message_body(body: str) -> Dict[str, Any]:
@@ -309,7 +377,7 @@ class SecurityUtils:
     def sanitize_filename(filename: str) -> str:
         """清理文件名，移除危险字符"""
         # 移除或替换危险字符
-        safe_chars = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        safe_chars = filename.translate(_FNAME_TRANS)
         
         # 移除前后空格和点
         safe_chars = safe_chars.strip('. ')
@@ -397,7 +465,7 @@ class LogUtils:
         log_entry = f"[{timestamp}] [{level}] {message}"
         
         if extra_data:
-            extra_str = json.dumps(extra_data, ensure_ascii=False)
+            extra_str = compact_json_dumps(extra_data)
             log_entry += f" | {extra_str}"
         
         return log_entry
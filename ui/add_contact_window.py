@@ -8,13 +8,23 @@ E-Chat 添加联系人窗口
 
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
+import logging
 import re
 from typing import Optional, Callable
 
 # 导入语言管理器
 from src.language_manager import language_manager
 
+logger = logging.getLogger(__name__)
+
+# 预编译的邮箱格式正则（每次按键都会调用校验）
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# 表单控件的固定样式参数（窗口每次打开都复用）
+_ENTRY_OPTS = {"width": 350, "height": 35, "font": ("Arial", 12)}
+_LABEL_BOLD_OPTS = {"font": ("Arial", 12, "bold"), "anchor": "w"}
+_BTN_OPTS = {"width": 120, "height": 40}
+
 
 class AddContactWindow(ctk.CTkToplevel):
     """添加联系人窗口类"""
@@ -28,54 +38,77 @@ class AddContactWindow(ctk.CTkToplevel):
         self.database_manager = app.database_manager
         self.on_contact_added = on_contact_added  # 添加成功后的回调函数
         
+        # 按键时反复使用的状态提示文本，窗口打开时翻译一次
+        self._t_invalid = "✗ " + language_manager.t("email_format_invalid")
+        self._t_available = "✓ " + language_manager.t("email_available")
+        self._t_exists = "⚠️ " + language_manager.t("contact_already_exists")
+        
+        # 输入防抖：连续按键只在停顿后执行一次校验
+        self._email_debounce_id = None
+        self._nickname_debounce_id = None
+        
+        # 联系人是否存在的查询结果缓存（键为小写邮箱），窗口存续期间有效
+        self._exists_cache = {}
+        
+        # 最近一次应用到控件上的状态，未变化时不再重复 configure
+        self._last_email_status = (None, None)
+        self._last_btn_state = "disabled"
+        
+        # 当前邮箱的最新校验结果，由输入/失焦处理更新，check_form_validity 直接读取
+        self._email_valid_fmt = False
+        self._email_exists = False
+        
         # 窗口设置
         self.setup_window()
         
         # 创建界面
         self.create_widgets()
         
-        print("➕ 添加联系人窗口初始化完成")
+        logger.debug("添加联系人窗口初始化完成")
     
     def setup_window(self):
         """设置窗口属性"""
+        # 先隐藏窗口，控件全部布局完成后再一次性显示
+        self.withdraw()
         self.title(language_manager.t("add_contact_title"))
         self.geometry("400x450")
         self.resizable(False, False)
         
-        # 居中显示
+        # 居中显示（模态抓取需要窗口可见，在 create_widgets 末尾显示后再设置）
         self.transient(self.parent)
-        self.grab_set()
         
         # 窗口关闭事件
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
     
     def create_widgets(self):
         """创建界面元素"""
+        t = language_manager.t
+        
+        # 表单使用单列 grid 布局，一次性确定各行位置
+        self.columnconfigure(0, weight=1)
+        
         # 标题
         title_label = ctk.CTkLabel(
             self,
-            text="➕ " + language_manager.t("add_new_contact"),
+            text="➕ " + t("add_new_contact"),
             font=("Arial", 18, "bold")
         )
-        title_label.pack(pady=(30, 40))
+        title_label.grid(row=0, column=0, pady=(30, 40))
         
         # 邮箱地址
         email_label = ctk.CTkLabel(
             self,
-            text=language_manager.t("email_address") + " *:",
-            font=("Arial", 12, "bold"),
-            anchor="w"
+            text=t("email_address") + " *:",
+            **_LABEL_BOLD_OPTS
         )
-        email_label.pack(anchor="w", padx=30, pady=(10, 5))
+        email_label.grid(row=1, column=0, sticky="w", padx=30, pady=(10, 5))
         
         self.email_entry = ctk.CTkEntry(
             self,
-            width=350,
-            height=35,
-            placeholder_text=language_manager.t("email_placeholder"),
-            font=("Arial", 12)
+            placeholder_text=t("email_placeholder"),
+            **_ENTRY_OPTS
         )
-        self.email_entry.pack(padx=30, pady=(0, 5))
+        self.email_entry.grid(row=2, column=0, padx=30, pady=(0, 5))
         
         # 邮箱验证状态
         self.email_status = ctk.CTkLabel(
@@ -84,161 +117,172 @@ class AddContactWindow(ctk.CTkToplevel):
             font=("Arial", 10),
             anchor="w"
         )
-        self.email_status.pack(anchor="w", padx=30, pady=(0, 20))
+        self.email_status.grid(row=3, column=0, sticky="w", padx=30, pady=(0, 20))
         
         # 昵称
         nickname_label = ctk.CTkLabel(
             self,
-            text=language_manager.t("nickname") + " *:",
-            font=("Arial", 12, "bold"),
-            anchor="w"
+            text=t("nickname") + " *:",
+            **_LABEL_BOLD_OPTS
         )
-        nickname_label.pack(anchor="w", padx=30, pady=(5, 5))
+        nickname_label.grid(row=4, column=0, sticky="w", padx=30, pady=(5, 5))
         
         self.nickname_entry = ctk.CTkEntry(
             self,
-            width=350,
-            height=35,
-            placeholder_text=language_manager.t("nickname_placeholder"),
-            font=("Arial", 12)
+            placeholder_text=t("nickname_placeholder"),
+            **_ENTRY_OPTS
         )
-        self.nickname_entry.pack(padx=30, pady=(0, 40))
+        self.nickname_entry.grid(row=5, column=0, padx=30, pady=(0, 40))
         
         # 按钮区域
         button_frame = ctk.CTkFrame(self, fg_color="transparent")
-        button_frame.pack(fill="x", padx=30, pady=(20, 30))
+        button_frame.grid(row=6, column=0, sticky="ew", padx=30, pady=(20, 30))
         
         # 取消按钮
         cancel_btn = ctk.CTkButton(
             button_frame,
-            text=language_manager.t("cancel"),
-            width=120,
-            height=40,
-            command=self.on_closing
+            text=t("cancel"),
+            command=self.on_closing,
+            **_BTN_OPTS
         )
         cancel_btn.pack(side="left", pady=10)
         
         # 添加按钮
         self.add_btn = ctk.CTkButton(
             button_frame,
-            text=language_manager.t("add_contact"),
-            width=120,
-            height=40,
+            text=t("add_contact"),
             command=self.add_contact,
-            state="disabled"
+            state="disabled",
+            **_BTN_OPTS
         )
         self.add_btn.pack(side="right", pady=10)
         
         # 绑定事件
         self.email_entry.bind("<KeyRelease>", self.on_email_change)
-        self.email_entry.bind("<FocusOut>", self.validate_email)
         self.nickname_entry.bind("<KeyRelease>", self.on_nickname_change)
         
+        # 一次完成布局后显示窗口
+        self.update_idletasks()
+        self.deiconify()
+        self.grab_set()
+        
         # 设置焦点到邮箱输入框
         self.email_entry.focus()
         
-        print("✅ 简化的添加联系人界面创建完成")
+        logger.debug("添加联系人界面创建完成")
     
 
     
     def on_email_change(self, event=None):
-        """邮箱输入改变事件"""
+        """邮箱输入改变事件（防抖，停止输入200ms后再校验）"""
+        if self._email_debounce_id:
+            self.after_cancel(self._email_debounce_id)
+        self._email_debounce_id = self.after(200, self._do_email_change)
+    
+    def _do_email_change(self):
+        """执行邮箱输入校验"""
+        self._email_debounce_id = None
         email = self.email_entry.get().strip()
+        nickname = self.nickname_entry.get().strip()
         
         if not email:
-            self.email_status.configure(text="", text_color="gray")
-            self.check_form_validity()
+            self._email_valid_fmt = self._email_exists = False
+            self._set_email_status("", "gray")
+            self._check_form_validity(email, nickname)
             return
         
-        # 实时格式验证
-        if self.is_valid_email_format(email):
-            self.email_status.configure(
-                text="✓ " + language_manager.t("email_format_valid"),
-                text_color="green"
-            )
+        # 实时验证格式及是否已存在（失焦时不再重复校验）
+        self._email_valid_fmt = self.is_valid_email_format(email)
+        self._email_exists = self._email_valid_fmt and self.is_contact_exists(email)
+        if not self._email_valid_fmt:
+            self._set_email_status(self._t_invalid, "red")
+        elif self._email_exists:
+            self._set_email_status(self._t_exists, "orange")
         else:
-            self.email_status.configure(
-                text="✗ " + language_manager.t("email_format_invalid"),
-                text_color="red"
-            )
+            self._set_email_status(self._t_available, "green")
         
         # 自动填充昵称
-        if not self.nickname_entry.get().strip() and "@" in email:
-            suggested_nickname = email.split("@")[0]
+        if not nickname and "@" in email:
+            nickname = email.split("@")[0]
             self.nickname_entry.delete(0, "end")
-            self.nickname_entry.insert(0, suggested_nickname)
-        
-        self.check_form_validity()
-    
-    def validate_email(self, event=None):
-        """验证邮箱（失去焦点时）"""
-        email = self.email_entry.get().strip()
-        
-        if not email:
-            return
-        
-        # 格式验证
-        if not self.is_valid_email_format(email):
-            self.email_status.configure(
-                text="✗ " + language_manager.t("email_format_invalid"),
-                text_color="red"
-            )
-            return
-        
-        # 检查是否已存在
-        if self.is_contact_exists(email):
-            self.email_status.configure(
-                text="⚠️ " + language_manager.t("contact_already_exists"),
-                text_color="orange"
-            )
-        else:
-            self.email_status.configure(
-                text="✓ " + language_manager.t("email_available"),
-                text_color="green"
-            )
+            self.nickname_entry.insert(0, nickname)
         
-        self.check_form_validity()
+        self._check_form_validity(email, nickname)
     
     def on_nickname_change(self, event=None):
-        """昵称输入改变事件"""
+        """昵称输入改变事件（防抖，停止输入100ms后再检查表单）"""
+        if self._nickname_debounce_id:
+            self.after_cancel(self._nickname_debounce_id)
+        self._nickname_debounce_id = self.after(100, self._do_nickname_change)
+    
+    def _do_nickname_change(self):
+        """执行昵称输入后的表单检查"""
+        self._nickname_debounce_id = None
         self.check_form_validity()
     
 
     
     def is_valid_email_format(self, email: str) -> bool:
         """验证邮箱格式"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        # 输入过程中的大多数中间状态缺少 "@" 或域名中的 "."，无需进入正则即可排除
+        at = email.find('@')
+        if at <= 0 or '.' not in email[at + 1:]:
+            return False
+        return _EMAIL_RE.fullmatch(email) is not None
     
     def is_contact_exists(self, email: str) -> bool:
         """检查联系人是否已存在"""
         try:
             if self.database_manager:
-                existing_contacts = self.database_manager.get_contacts()
-                return any(contact["email"].lower() == email.lower() for contact in existing_contacts)
-        except Exception as e:
-            print(f"❌ 检查联系人失败: {e}")
+                key = email.lower()
+                exists = self._exists_cache.get(key)
+                if exists is None:
+                    exists = self.database_manager.contact_exists(key)
+                    # 限制缓存大小，超出时淘汰最早的条目
+                    if len(self._exists_cache) >= 128:
+                        self._exists_cache.pop(next(iter(self._exists_cache)))
+                    self._exists_cache[key] = exists
+                return exists
+        except Exception:
+            logger.exception("检查联系人失败")
         
         return False
     
+    def _set_email_status(self, text: str, color: str):
+        """更新邮箱状态提示（内容未变化时跳过，避免重复重绘）"""
+        status = (text, color)
+        if status != self._last_email_status:
+            self.email_status.configure(text=text, text_color=color)
+            self._last_email_status = status
+    
     def check_form_validity(self):
         """检查表单有效性"""
-        email = self.email_entry.get().strip()
-        nickname = self.nickname_entry.get().strip()
-        
-        # 检查必填字段和格式
-        is_valid = (
+        self._check_form_validity(
+            self.email_entry.get().strip(),
+            self.nickname_entry.get().strip()
+        )
+    
+    def _check_form_validity(self, email: str, nickname: str):
+        """根据已读取的输入内容检查表单有效性"""
+        # 检查必填字段，格式与重复性复用最近一次邮箱校验的结果
+        is_valid = bool(
             email and 
             nickname and 
-            self.is_valid_email_format(email) and 
-            not self.is_contact_exists(email)
+            self._email_valid_fmt and 
+            not self._email_exists
         )
         
         # 更新添加按钮状态
-        self.add_btn.configure(state="normal" if is_valid else "disabled")
+        state = "normal" if is_valid else "disabled"
+        if state != self._last_btn_state:
+            self.add_btn.configure(state=state)
+            self._last_btn_state = state
     
     def add_contact(self):
         """添加联系人"""
+        # 对话框只在提交时用到，按需导入
+        from tkinter import messagebox
+        
         try:
             # 获取表单数据
             email = self.email_entry.get().strip()
@@ -274,6 +318,7 @@ class AddContactWindow(ctk.CTkToplevel):
                 )
                 
                 if success:
+                    self._exists_cache.clear()
                     messagebox.showinfo(
                         language_manager.t("success"),
                         language_manager.t("contact_added_successfully")
@@ -291,6 +336,7 @@ class AddContactWindow(ctk.CTkToplevel):
                         })
                     
                     # 关闭窗口
+                    self._cancel_pending_checks()
                     self.destroy()
                 else:
                     messagebox.showerror(
@@ -304,7 +350,7 @@ class AddContactWindow(ctk.CTkToplevel):
                 )
                 
         except Exception as e:
-            print(f"❌ 添加联系人失败: {e}")
+            logger.exception("添加联系人失败")
             messagebox.showerror(
                 language_manager.t("error"),
                 f"{language_manager.t('add_contact_failed')}: {str(e)}"
@@ -312,6 +358,15 @@ class AddContactWindow(ctk.CTkToplevel):
     
 
     
+    def _cancel_pending_checks(self):
+        """取消尚未执行的防抖回调，避免在已销毁的窗口上运行"""
+        for debounce_id in (self._email_debounce_id, self._nickname_debounce_id):
+            if debounce_id:
+                self.after_cancel(debounce_id)
+        self._email_debounce_id = None
+        self._nickname_debounce_id = None
+    
     def on_closing(self):
         """窗口关闭事件"""
+        self._cancel_pending_checks()
         self.destroy() 
\ No newline at end of file
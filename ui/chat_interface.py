@@ -8,14 +8,60 @@ E-Chat 聊天界面组件
 
 import customtkinter as ctk
 import tkinter as tk
+import threading
+import time
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import date, datetime
 # 导入语言管理器和主题配置
 from src.language_manager import language_manager
 from ui.theme_config import theme, get_color, get_font
 from ui.components.message_bubble import MessageContainer
 from ui.enhanced_components import ModernEntry, HoverButton
 
+# 虚拟化消息列表：未测量行的估计高度，以及可视区域上下额外保留的行数
+_ESTIMATED_ROW_HEIGHT = 80
+_OVERSCAN_ROWS = 5
+
+# 历史消息分页：每页条数，以及滚动到距顶部多近（视图比例）时预取更早的一页
+_HISTORY_PAGE_SIZE = 50
+_PREFETCH_THRESHOLD = 0.1
+
+# 内存中最多保留的消息条数，超出时丢弃最早的消息
+_MAX_MESSAGES = 2000
+
+# 平滑滚动：ease-out cubic 缓动的 8 帧位置比例，及动画总时长（毫秒）
+_SMOOTH_SCROLL_STEPS = tuple(1.0 - (1 - i / 8) ** 3 for i in range(1, 9))
+_SMOOTH_SCROLL_MS = 120
+
+# 打字指示器动画依次显示的省略点
+_TYPING_DOTS = ("", ".", "..", "...")
+
+
+def _now_hm() -> str:
+    """当前时间的 "HH:MM" 文本（发送、回复时的消息时间戳）"""
+    return datetime.now().strftime("%H:%M")
+
+
+@lru_cache(maxsize=512)
+def _format_date_label(date_str: str, today_iso: str) -> str:
+    """日期分隔符的显示文本（today_iso 作为缓存键的一部分，跨天后自动失效）"""
+    try:
+        day = date.fromisoformat(date_str)
+        today = date.fromisoformat(today_iso)
+    except ValueError:
+        return date_str
+    
+    if day == today:
+        return "今天"
+    if (today - day).days == 1:
+        return "昨天"
+    return day.strftime("%m月%d日")
+
 
 class ChatInterface(ctk.CTkFrame):
     """聊天界面组件"""
@@ -26,16 +72,78 @@ class ChatInterface(ctk.CTkFrame):
         
         self.parent = parent
         self.current_contact = None
-        self.messages = []  # 当前聊天的消息列表
+        self.messages = deque(maxlen=_MAX_MESSAGES)  # 当前聊天的消息列表（有上限）
+        self._message_ids = set()  # 已显示消息的ID，用于O(1)去重
         self.typing_indicator = None  # 打字指示器
+        self._typing_after_id = None  # 打字动画下一帧的 after 回调ID
+        self._typing_base = ""  # 打字提示的固定部分（不含省略点）
+        self._typing_dots = 0  # 当前显示的省略点数量
         self.last_message_date = None  # 用于时间分组
         
+        # 虚拟化渲染状态：只为可视区域内的消息创建气泡
+        self._spacer = None  # 撑起完整滚动高度的占位框架，气泡 place 在其中
+        self._row_heights = []  # 每条消息的行高（含上下间距，逻辑像素）
+        self._row_measured = []  # 行高是否已按实际控件测量
+        self._row_offsets = [0]  # 行顶部偏移的前缀和，长度为消息数+1
+        self._live_bubbles = {}  # 消息下标 -> 已创建的气泡控件
+        self._bubble_by_id = {}  # 消息ID -> 已创建的气泡控件，用于按ID更新状态
+        self._refresh_pending = False
+        self._scroll_after_ids = []  # 平滑滚动动画中待执行的帧
+        
+        # 历史消息分页状态
+        self._history_contact = None  # 当前已加载历史的联系人邮箱
+        self._history_cursor = None  # 已加载的最早一条消息的 id
+        self._history_exhausted = True  # 是否已无更早的消息
+        self._history_loading = False  # 是否有预取请求在进行中
+        self._history_generation = 0  # 每次加载聊天记录时递增，用于丢弃过期的预取结果
+        self._prefetch_ready = False  # 首次滚动到底部之后才允许预取
+        self._scroll_bottom_id = None  # 待执行的滚动到底部回调
+        
+        # 数据库写入和邮件发送放到后台线程，避免阻塞界面；
+        # 只用一个工作线程，保证消息按输入顺序写入和发出
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-io")
+        # 后台线程不能直接调用 Tk，结果放入队列，由主线程定时取出处理
+        self._results = queue.SimpleQueue()
+        self._pending_results = 0  # 尚未取回结果的后台任务数（只在主线程中修改）
+        self._results_after_id = None
+        
+        # 父窗口上的应用对象引用，由 _resolve_parent_refs 解析一次后直接使用
+        self._db = None  # 数据库管理器
+        self._app_send = None  # 应用的发送消息接口
+        self._chat_list = None  # 左侧聊天列表
+        
+        # 聊天列表“最后消息”更新的合并：联系人邮箱 -> (内容, 时间)，150ms 内只刷新一次
+        self._pending_last_msg = {}
+        self._last_msg_after_id = None
+        
+        # 联系人头部的在线状态文本，切换语言时重新翻译
+        self._cache_status_texts()
+        
+        # 本界面用到的主题颜色和字体只解析一次（颜色为 (亮色, 暗色) 元组，与当前外观模式无关）
+        self._c = {name: get_color(name) for name in (
+            "white", "primary", "primary_hover", "primary_dark",
+            "gray_50", "gray_100", "gray_200", "gray_300", "gray_400",
+            "gray_500", "gray_600", "gray_800", "success", "danger"
+        )}
+        self._f = {
+            "lg_bold": get_font("lg", "bold"),
+            "sm": get_font("sm"),
+            "md": get_font("md"),
+            "base": get_font("base"),
+            "md_bold": get_font("md", "bold"),
+            "4xl": get_font("4xl"),
+            "2xl_bold": get_font("2xl", "bold"),
+            "xs": get_font("xs"),
+        }
+        
         # 创建界面元素
         self.create_widgets()
         
         # 显示欢迎界面
         self.show_welcome_screen()
         
+        self._resolve_parent_refs()
+        
         print("💬 聊天界面初始化完成")
     
     def create_widgets(self):
@@ -59,9 +167,9 @@ class ChatInterface(ctk.CTkFrame):
             self, 
             height=70, 
             corner_radius=0,
-            fg_color=get_color("white"),
+            fg_color=self._c["white"],
             border_width=1,
-            border_color=get_color("gray_200")
+            border_color=self._c["gray_200"]
         )
         self.header_frame.grid(row=0, column=0, sticky="ew", padx=0, pady=0)
         self.header_frame.grid_propagate(False)
@@ -73,9 +181,9 @@ class ChatInterface(ctk.CTkFrame):
             width=theme.SIZES["avatar_lg"], 
             height=theme.SIZES["avatar_lg"], 
             corner_radius=theme.SIZES["avatar_lg"]//2,
-            fg_color=get_color("primary"),
+            fg_color=self._c["primary"],
             border_width=2,
-            border_color=get_color("white")
+            border_color=self._c["white"]
         )
         self.contact_avatar.grid(row=0, column=0, padx=(theme.SPACING["lg"], theme.SPACING["md"]), pady=theme.SPACING["md"])
         self.contact_avatar.grid_propagate(False)
@@ -84,8 +192,8 @@ class ChatInterface(ctk.CTkFrame):
         self.avatar_label = ctk.CTkLabel(
             self.contact_avatar,
             text="?",
-            font=get_font("lg", "bold"),
-            text_color=get_color("white")
+            font=self._f["lg_bold"],
+            text_color=self._c["white"]
         )
         self.avatar_label.place(relx=0.5, rely=0.5, anchor="center")
         
@@ -98,8 +206,8 @@ class ChatInterface(ctk.CTkFrame):
         self.contact_name = ctk.CTkLabel(
             info_frame,
             text=language_manager.t("select_contact_to_start"),
-            font=get_font("lg", "bold"),
-            text_color=get_color("gray_800"),
+            font=self._f["lg_bold"],
+            text_color=self._c["gray_800"],
             anchor="w"
         )
         self.contact_name.grid(row=0, column=0, sticky="w", pady=(0, theme.SPACING["xs"]))
@@ -108,8 +216,8 @@ class ChatInterface(ctk.CTkFrame):
         self.contact_status = ctk.CTkLabel(
             info_frame,
             text="",
-            font=get_font("sm"),
-            text_color=get_color("gray_500"),
+            font=self._f["sm"],
+            text_color=self._c["gray_500"],
             anchor="w"
         )
         self.contact_status.grid(row=1, column=0, sticky="w")
@@ -125,9 +233,9 @@ class ChatInterface(ctk.CTkFrame):
             width=36,
             height=36,
             corner_radius=theme.RADIUS["full"],
-            font=get_font("md"),
+            font=self._f["md"],
             fg_color="transparent",
-            text_color=get_color("gray_600"),
+            text_color=self._c["gray_600"],
             command=self.show_more_options
         )
         self.more_btn.grid(row=0, column=0)
@@ -138,13 +246,21 @@ class ChatInterface(ctk.CTkFrame):
         self.message_scrollable = ctk.CTkScrollableFrame(
             self,
             corner_radius=0,
-            fg_color=get_color("gray_50"),
-            scrollbar_button_color=get_color("gray_300"),
-            scrollbar_button_hover_color=get_color("gray_400")
+            fg_color=self._c["gray_50"],
+            scrollbar_button_color=self._c["gray_300"],
+            scrollbar_button_hover_color=self._c["gray_400"]
         )
         self.message_scrollable.grid(row=1, column=0, sticky="nsew", padx=0, pady=0)
         self.message_scrollable.grid_columnconfigure(0, weight=1)
         
+        # 消息区的全部内容都放在这个容器中，清空时只需销毁容器本身
+        self._messages_holder = None
+        self._reset_messages_holder()
+        
+        # 接管画布的滚动回调：视图变化（滚动、缩放）时刷新可视窗口内的气泡
+        self._scrollbar_set = self.message_scrollable._scrollbar.set
+        self.message_scrollable._parent_canvas.configure(yscrollcommand=self._on_canvas_yview)
+        
         print("📜 现代化消息显示区域创建完成")
     
     def create_input_area(self):
@@ -154,9 +270,9 @@ class ChatInterface(ctk.CTkFrame):
             self, 
             height=80,  # 增加高度以提供更好的视觉效果
             corner_radius=0,
-            fg_color=get_color("white"),
+            fg_color=self._c["white"],
             border_width=1,
-            border_color=get_color("gray_200")
+            border_color=self._c["gray_200"]
         )
         input_area.grid(row=2, column=0, sticky="ew", padx=0, pady=0)
         input_area.grid_propagate(False)
@@ -172,11 +288,11 @@ class ChatInterface(ctk.CTkFrame):
             input_container,
             height=50,
             corner_radius=theme.RADIUS["lg"],
-            font=get_font("base"),
+            font=self._f["base"],
             wrap="word",
             border_width=1,
-            border_color=get_color("gray_300"),
-            fg_color=get_color("gray_50")
+            border_color=self._c["gray_300"],
+            fg_color=self._c["gray_50"]
         )
         
         # 添加输入框聚焦效果
@@ -190,10 +306,10 @@ class ChatInterface(ctk.CTkFrame):
             width=50,
             height=50,
             corner_radius=theme.RADIUS["full"],
-            font=get_font("md", "bold"),
-            fg_color=get_color("primary"),
-            hover_color=get_color("primary_hover"),
-            text_color=get_color("white"),
+            font=self._f["md_bold"],
+            fg_color=self._c["primary"],
+            hover_color=self._c["primary_hover"],
+            text_color=self._c["white"],
             command=self.send_message
         )
         self.send_btn.grid(row=0, column=1)
@@ -210,7 +326,7 @@ class ChatInterface(ctk.CTkFrame):
         def on_focus_in(event):
             try:
                 self.message_entry.configure(
-                    border_color=get_color("primary"),
+                    border_color=self._c["primary"],
                     border_width=2
                 )
             except:
@@ -219,7 +335,7 @@ class ChatInterface(ctk.CTkFrame):
         def on_focus_out(event):
             try:
                 self.message_entry.configure(
-                    border_color=get_color("gray_300"),
+                    border_color=self._c["gray_300"],
                     border_width=1
                 )
             except:
@@ -228,19 +344,28 @@ class ChatInterface(ctk.CTkFrame):
         self.message_entry.bind("<FocusIn>", on_focus_in)
         self.message_entry.bind("<FocusOut>", on_focus_out)
     
+    def _reset_messages_holder(self):
+        """销毁并重建消息容器，一次性清除其中的全部控件"""
+        self.hide_typing_indicator()
+        if self._messages_holder is not None:
+            self._messages_holder.destroy()
+        self._messages_holder = ctk.CTkFrame(self.message_scrollable, fg_color="transparent")
+        self._messages_holder.grid(row=0, column=0, sticky="nsew")
+        self._messages_holder.grid_columnconfigure(0, weight=1)
+        self._reset_virtual_rows()
+    
     def show_welcome_screen(self):
         """显示现代化欢迎界面"""
         # 清除现有内容
-        for widget in self.message_scrollable.winfo_children():
-            widget.destroy()
+        self._reset_messages_holder()
+        self._history_contact = None
         
-        # 配置滚动区域的网格
-        self.message_scrollable.grid_rowconfigure(0, weight=1)
-        self.message_scrollable.grid_columnconfigure(0, weight=1)
+        # 配置容器的网格
+        self._messages_holder.grid_rowconfigure(0, weight=1)
         
         # 现代化欢迎内容容器
         welcome_container = ctk.CTkFrame(
-            self.message_scrollable,
+            self._messages_holder,
             fg_color="transparent"
         )
         welcome_container.grid(row=0, column=0, sticky="")
@@ -249,8 +374,8 @@ class ChatInterface(ctk.CTkFrame):
         welcome_icon = ctk.CTkLabel(
             welcome_container,
             text="💬",
-            font=get_font("4xl"),
-            text_color=get_color("primary")
+            font=self._f["4xl"],
+            text_color=self._c["primary"]
         )
         welcome_icon.pack(pady=(0, theme.SPACING["xl"]))
         
@@ -258,8 +383,8 @@ class ChatInterface(ctk.CTkFrame):
         welcome_title = ctk.CTkLabel(
             welcome_container,
             text=language_manager.t("welcome_title"),
-            font=get_font("2xl", "bold"),
-            text_color=get_color("gray_800")
+            font=self._f["2xl_bold"],
+            text_color=self._c["gray_800"]
         )
         welcome_title.pack(pady=(0, theme.SPACING["md"]))
         
@@ -267,14 +392,23 @@ class ChatInterface(ctk.CTkFrame):
         welcome_desc = ctk.CTkLabel(
             welcome_container,
             text=language_manager.t("welcome_desc"),
-            font=get_font("base"),
-            text_color=get_color("gray_500"),
+            font=self._f["base"],
+            text_color=self._c["gray_500"],
             justify="center"
         )
         welcome_desc.pack()
     
+    def _resolve_parent_refs(self):
+        """解析父窗口上的数据库、发送接口和聊天列表（不存在时为 None）"""
+        app = getattr(self.parent, 'app', None)
+        self._db = getattr(app, 'database_manager', None)
+        self._app_send = getattr(app, 'send_message', None)
+        self._chat_list = getattr(self.parent, 'chat_list', None)
+    
     def switch_contact(self, contact: Dict):
         """切换到指定联系人的聊天"""
+        # 聊天列表等组件可能在本组件之后才创建，切换联系人时重新解析一次
+        self._resolve_parent_refs()
         self.current_contact = contact
         
         # 更新头部信息
@@ -290,16 +424,19 @@ class ChatInterface(ctk.CTkFrame):
     
     def update_contact_header(self, contact: Dict):
         """更新联系人头部信息"""
+        nickname = contact["nickname"] or ""
+        online = contact["online"]
+        
         # 更新头像
-        avatar_text = contact["nickname"][0].upper() if contact["nickname"] else "?"
+        avatar_text = nickname[0].upper() if nickname else "?"
         self.avatar_label.configure(text=avatar_text)
         
         # 更新姓名
-        self.contact_name.configure(text=contact["nickname"])
+        self.contact_name.configure(text=nickname)
         
         # 更新状态
-        status_text = language_manager.t("status_online") if contact["online"] else language_manager.t("status_offline")
-        status_color = "green" if contact["online"] else "gray60"
+        status_text = self._t_online if online else self._t_offline
+        status_color = "green" if online else "gray60"
         self.contact_status.configure(
             text=f"{contact['email']} • {status_text}",
             text_color=status_color
@@ -308,29 +445,28 @@ class ChatInterface(ctk.CTkFrame):
     def load_chat_history(self, contact: Dict):
         """加载聊天历史记录"""
         # 清除现有消息
-        for widget in self.message_scrollable.winfo_children():
-            widget.destroy()
+        self._reset_messages_holder()
+        self._history_contact = None
+        self._history_generation += 1
+        self._prefetch_ready = False
         
-        # 尝试从数据库加载消息
+        # 尝试从数据库加载消息（只取最新一页，更早的消息在滚动到顶部附近时再加载）
         try:
-            if hasattr(self.parent, 'app') and hasattr(self.parent.app, 'database_manager'):
-                db_messages = self.parent.app.database_manager.get_messages(contact["email"])
+            if self._db is not None:
+                db_messages = self._db.get_messages(
+                    contact["email"], limit=_HISTORY_PAGE_SIZE
+                )
                 
                 if db_messages:
-                    # 转换数据库格式到UI格式，按时间排序
-                    self.messages = []
-                    for msg in db_messages:
-                        ui_message = {
-                            "id": msg.get("id", ""),  # 添加消息ID用于去重
-                            "sender": msg.get("sender_email", ""),
-                            "content": msg.get("content", ""),
-                            "timestamp": self.format_db_timestamp(msg.get("sent_at")),
-                            "is_sent": msg.get("is_sent", False)
-                        }
-                        self.messages.append(ui_message)
+                    # 转换数据库格式到UI格式（get_messages 已按 id 正序返回，无需再排序）
+                    self.messages.clear()
+                    self.messages.extend(self._to_ui_messages(db_messages))
+                    self._message_ids = {m["id"] for m in self.messages if m.get("id")}
                     
-                    # 按时间排序确保消息顺序正确
-                    self.messages.sort(key=lambda x: x.get("id", 0))
+                    self._history_contact = contact["email"]
+                    self._history_cursor = db_messages[0]["id"]
+                    self._history_exhausted = len(db_messages) < _HISTORY_PAGE_SIZE
+                    self._history_loading = False
                     
                     print(f"📜 从数据库加载了 {len(db_messages)} 条消息")
                     self.display_messages()
@@ -341,7 +477,9 @@ class ChatInterface(ctk.CTkFrame):
             print(f"❌ 从数据库加载消息失败: {e}")
         
         # 如果数据库没有消息，添加一些示例消息用于演示
-        self.messages = self.create_demo_messages(contact)
+        self.messages.clear()
+        self.messages.extend(self.create_demo_messages(contact))
+        self._message_ids = {m["id"] for m in self.messages if m.get("id")}
         print(f"📭 与 {contact['nickname']} 的聊天记录为空，显示演示消息")
         
         # 显示消息列表
@@ -349,6 +487,106 @@ class ChatInterface(ctk.CTkFrame):
         # 滚动到底部
         self.scroll_to_bottom()
     
+    def _to_ui_messages(self, rows: List[Dict]) -> List[Dict]:
+        """将一批数据库消息记录转换为界面使用的消息字典
+        
+        get_messages 返回的每行都包含全部列，直接按键取值；
+        时间格式化方法先绑定到局部变量，循环内不再逐行查找属性。
+        """
+        format_timestamp = self.format_db_timestamp
+        now_hm = _now_hm()
+        return [
+            {
+                "id": row["id"],  # 消息ID用于去重
+                "sender": row["sender_email"],
+                "content": row["content"],
+                "timestamp": format_timestamp(row["sent_at"], now_hm),
+                "is_sent": row["is_sent"]
+            }
+            for row in rows
+        ]
+    
+    def _maybe_prefetch_older(self):
+        """滚动接近顶部时，在后台线程加载更早的一页历史消息"""
+        # 首次滚动到底部之前视图停在顶部，此时不应触发预取
+        if (not self._prefetch_ready or self._history_contact is None
+                or self._history_exhausted or self._history_loading):
+            return
+        # 已达到内存中的消息上限，不再加载更早的消息
+        if len(self.messages) >= _MAX_MESSAGES:
+            return
+        if self._db is None:
+            return
+        
+        self._history_loading = True
+        self._expect_result()
+        threading.Thread(
+            target=self._fetch_older_page,
+            args=(self._db, self._history_generation, self._history_contact, self._history_cursor),
+            daemon=True
+        ).start()
+    
+    def _fetch_older_page(self, database_manager, generation: int, email: str, before_id: int):
+        """后台线程：查询 before_id 之前的一页消息，结果放入队列交回主线程处理"""
+        try:
+            batch = database_manager.get_messages(email, before_id=before_id, limit=_HISTORY_PAGE_SIZE)
+        except Exception as e:
+            print(f"❌ 加载更早的消息失败: {e}")
+            batch = None
+        self._results.put((self._prepend_messages, (generation, email, batch)))
+    
+    def _prepend_messages(self, generation: int, email: str, batch: Optional[List[Dict]]):
+        """在列表顶部插入更早的消息，并保持当前可见内容不跳动"""
+        # 之后又重新加载过聊天记录（如切换联系人后又切回），结果已过期
+        if generation != self._history_generation:
+            return
+        self._history_loading = False
+        # 加载期间清空了聊天或查询失败，丢弃结果
+        if batch is None or email != self._history_contact or self._spacer is None:
+            return
+        if len(batch) < _HISTORY_PAGE_SIZE:
+            self._history_exhausted = True
+        if not batch:
+            return
+        
+        # 跳过已显示的消息，避免重复插入（游标仍按整页前移）
+        self._history_cursor = batch[0]["id"]
+        batch = [row for row in batch if row["id"] not in self._message_ids]
+        if not batch:
+            return
+        
+        # 只插入上限内还能容纳的部分（deque 从左侧插入时会挤掉最新的消息）
+        room = _MAX_MESSAGES - len(self.messages)
+        if room <= 0:
+            return
+        if len(batch) > room:
+            batch = batch[-room:]
+        
+        self._history_cursor = batch[0]["id"]
+        count = len(batch)
+        canvas = self.message_scrollable._parent_canvas
+        old_top = canvas.canvasy(0)
+        
+        # 新行插在前面，已渲染气泡的下标整体后移
+        older = self._to_ui_messages(batch)
+        self.messages.extendleft(reversed(older))
+        self._message_ids.update(m["id"] for m in older if m.get("id"))
+        self._row_heights[:0] = [_ESTIMATED_ROW_HEIGHT] * count
+        self._row_measured[:0] = [False] * count
+        self._live_bubbles = {index + count: bubble for index, bubble in self._live_bubbles.items()}
+        self._rebuild_offsets()
+        self._spacer.configure(height=self._row_offsets[-1])
+        self._place_live_bubbles()
+        
+        # 滚动区域更新后，按新增高度把视图下移，保持原来的内容在原位置
+        self.message_scrollable.update_idletasks()
+        bbox = canvas.bbox("all")
+        if bbox:
+            added = self._row_offsets[count] * self._spacer._get_widget_scaling()
+            canvas.yview_moveto((old_top + added) / max(bbox[3] - bbox[1], 1))
+        
+        print(f"📜 加载了 {count} 条更早的消息")
+    
     def create_demo_messages(self, contact: Dict):
         """创建演示消息"""
         return [
@@ -376,73 +614,228 @@ class ChatInterface(ctk.CTkFrame):
         ]
     
     def display_messages(self):
-        """显示消息列表"""
-        for i, message in enumerate(self.messages):
-            self.add_message_bubble(message, i)
+        """显示消息列表（虚拟化：只创建可视区域附近的气泡）"""
+        if self._spacer is not None:
+            self._spacer.destroy()
+        self._reset_virtual_rows()
+        
+        count = len(self.messages)
+        self._row_heights = [_ESTIMATED_ROW_HEIGHT] * count
+        self._row_measured = [False] * count
+        self._rebuild_offsets()
+        
+        # 占位框架撑起全部消息的高度，使滚动条反映完整长度
+        self._spacer = ctk.CTkFrame(
+            self._messages_holder,
+            fg_color="transparent",
+            height=self._row_offsets[-1]
+        )
+        self._spacer.grid(row=0, column=0, sticky="ew", padx=theme.SPACING["md"])
+        
+        self.message_scrollable.update_idletasks()
+        self._refresh_window()
+    
+    def _reset_virtual_rows(self):
+        """清空虚拟化状态（对应控件已随滚动区域一起销毁）"""
+        self._spacer = None
+        self._live_bubbles = {}
+        self._bubble_by_id = {}
+        self._row_heights = []
+        self._row_measured = []
+        self._row_offsets = [0]
+    
+    def _rebuild_offsets(self):
+        """根据行高重新计算各行顶部偏移"""
+        offsets = [0]
+        total = 0
+        for height in self._row_heights:
+            total += height
+            offsets.append(total)
+        self._row_offsets = offsets
+    
+    def _on_canvas_yview(self, first, last):
+        """画布视图变化回调：更新滚动条并安排刷新可视气泡"""
+        self._scrollbar_set(first, last)
+        self._schedule_refresh()
+        if float(first) < _PREFETCH_THRESHOLD:
+            self._maybe_prefetch_older()
+    
+    def _schedule_refresh(self):
+        """合并同一轮事件中的多次刷新请求"""
+        if self._spacer is not None and not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh_window)
+    
+    def _visible_rows(self):
+        """计算需要渲染的消息下标范围 [start, end)"""
+        canvas = self.message_scrollable._parent_canvas
+        scaling = self._spacer._get_widget_scaling()
+        spacer_y = self._messages_holder.winfo_y() + self._spacer.winfo_y()
+        top = (canvas.canvasy(0) - spacer_y) / scaling
+        bottom = top + canvas.winfo_height() / scaling
+        
+        offsets = self._row_offsets
+        count = len(self._row_heights)
+        start = max(bisect_right(offsets, top) - 1 - _OVERSCAN_ROWS, 0)
+        end = min(bisect_left(offsets, bottom) + _OVERSCAN_ROWS, count)
+        return start, end
+    
+    def _refresh_window(self):
+        """销毁移出可视范围的气泡，为进入可视范围的消息创建气泡"""
+        self._refresh_pending = False
+        if self._spacer is None or not self._spacer.winfo_exists():
+            return
+        
+        start, end = self._visible_rows()
+        
+        for index in [i for i in self._live_bubbles if not start <= i < end]:
+            bubble = self._live_bubbles.pop(index)
+            self._bubble_by_id.pop(bubble.message_id, None)
+            bubble.destroy()
+        
+        missing = [index for index in range(start, end) if index not in self._live_bubbles]
+        if not missing:
+            return
+        
+        # 批量创建期间暂时断开滚动回调，避免中途的布局变化反复触发滚动条更新和刷新
+        canvas = self.message_scrollable._parent_canvas
+        canvas.configure(yscrollcommand="")
+        try:
+            for index in missing:
+                self._live_bubbles[index] = self.add_message_bubble(self.messages[index], index)
+            
+            # 全部气泡创建完后只做一次布局计算
+            self._spacer.update_idletasks()
+            
+            # 首次渲染的行按实际高度修正估计值，之后再访问不必重新测量
+            scaling = self._spacer._get_widget_scaling()
+            changed = False
+            for index in missing:
+                if self._row_measured[index]:
+                    continue
+                self._row_measured[index] = True
+                height = self._live_bubbles[index].winfo_reqheight() / scaling + 2 * theme.SPACING["sm"]
+                if height != self._row_heights[index]:
+                    self._row_heights[index] = height
+                    changed = True
+            
+            if changed:
+                self._rebuild_offsets()
+                self._spacer.configure(height=self._row_offsets[-1])
+                self._place_live_bubbles()
+                self._spacer.update_idletasks()
+        finally:
+            canvas.configure(yscrollcommand=self._on_canvas_yview)
+        
+        # 恢复后同步一次滚动条；行高有变化时可视范围可能随之变化，再检查一次
+        self._scrollbar_set(*canvas.yview())
+        if changed:
+            self._schedule_refresh()
+    
+    def _place_live_bubbles(self):
+        """按最新的行偏移重新放置已渲染的气泡"""
+        for index, bubble in self._live_bubbles.items():
+            bubble.place(x=0, y=self._row_offsets[index] + theme.SPACING["sm"], relwidth=1.0)
     
     def add_message_bubble(self, message: Dict, row: int):
-        """添加现代化消息气泡"""
+        """添加现代化消息气泡（放置在占位框架中第 row 行的位置）"""
         # 使用新的MessageContainer组件
-        message_container = MessageContainer(self.message_scrollable, message)
-        message_container.grid(
-            row=row, 
-            column=0, 
-            sticky="ew", 
-            padx=theme.SPACING["md"], 
-            pady=theme.SPACING["sm"]
+        message_container = MessageContainer(self._spacer, message)
+        message_container.message_id = message.get("id")
+        if message_container.message_id:
+            self._bubble_by_id[message_container.message_id] = message_container
+        message_container.place(
+            x=0,
+            y=self._row_offsets[row] + theme.SPACING["sm"],
+            relwidth=1.0
         )
+        return message_container
     
     def add_new_message(self, message: Dict):
         """添加新消息（用于实时接收）"""
         # 检查消息是否已存在（防重复）
         message_id = message.get("id", "")
-        if message_id and any(msg.get("id") == message_id for msg in self.messages):
+        if message_id and message_id in self._message_ids:
             print(f"⚠️ 消息已存在，跳过重复添加: {message_id}")
             return
         
-        # 添加到消息列表
+        # 添加到消息列表（已满时先移除最早的一条及其行）
+        if len(self.messages) == _MAX_MESSAGES:
+            self._drop_oldest_row()
         self.messages.append(message)
+        if message_id:
+            self._message_ids.add(message_id)
         
-        # 显示新消息气泡
-        self.add_message_bubble(message, len(self.messages) - 1)
+        # 追加一行并刷新可视窗口（新消息在底部，滚动后即被渲染）
+        if self._spacer is None:
+            self.display_messages()
+        else:
+            self._row_heights.append(_ESTIMATED_ROW_HEIGHT)
+            self._row_measured.append(False)
+            self._row_offsets.append(self._row_offsets[-1] + _ESTIMATED_ROW_HEIGHT)
+            self._spacer.configure(height=self._row_offsets[-1])
+            self._schedule_refresh()
         
         # 平滑滚动到底部显示新消息
         self.scroll_to_bottom_smooth()
         
         print(f"📬 已添加新消息: {message.get('content', '')[:30]}...")
     
+    def _drop_oldest_row(self):
+        """移除最早的一条消息，同步更新行高、偏移和已渲染气泡的下标"""
+        dropped = self.messages.popleft()
+        self._message_ids.discard(dropped.get("id"))
+        if self._spacer is None:
+            return
+        
+        del self._row_heights[0]
+        del self._row_measured[0]
+        bubble = self._live_bubbles.pop(0, None)
+        if bubble is not None:
+            self._bubble_by_id.pop(bubble.message_id, None)
+            bubble.destroy()
+        self._live_bubbles = {index - 1: bubble for index, bubble in self._live_bubbles.items()}
+        self._rebuild_offsets()
+        self._place_live_bubbles()
+    
     def scroll_to_bottom(self):
         """滚动到底部"""
-        self.after(100, lambda: self.message_scrollable._parent_canvas.yview_moveto(1.0))
+        # 快速切换联系人时取消上一次未执行的跳转
+        if self._scroll_bottom_id is not None:
+            self.after_cancel(self._scroll_bottom_id)
+        self._scroll_bottom_id = self.after(100, self._jump_to_bottom)
+    
+    def _jump_to_bottom(self):
+        """跳转到底部，之后滚动接近顶部时才开始预取更早的消息"""
+        self._scroll_bottom_id = None
+        self.message_scrollable._parent_canvas.yview_moveto(1.0)
+        self._prefetch_ready = True
     
     def scroll_to_bottom_smooth(self):
         """平滑滚动到底部"""
-        def smooth_scroll():
-            try:
-                canvas = self.message_scrollable._parent_canvas
-                current_pos = canvas.canvasy(0) / canvas.bbox("all")[3]
-                target_pos = 1.0
-                
-                # 如果已经在底部附近，直接跳转
-                if abs(current_pos - target_pos) < 0.1:
-                    canvas.yview_moveto(1.0)
-                    return
-                
-                # 平滑滚动动画
-                step = 0.15
-                next_pos = current_pos + (target_pos - current_pos) * step
-                canvas.yview_moveto(next_pos)
-                
-                # 继续动画或完成
-                if abs(next_pos - target_pos) > 0.01:
-                    self.after(16, smooth_scroll)  # ~60fps
-                else:
-                    canvas.yview_moveto(1.0)
-            except:
-                # fallback到普通滚动
-                self.scroll_to_bottom()
+        # 取消尚未执行完的上一次动画，避免两组帧交替跳动
+        for after_id in self._scroll_after_ids:
+            self.after_cancel(after_id)
+        self._scroll_after_ids = [self.after(50, self._start_smooth_scroll)]
+    
+    def _start_smooth_scroll(self):
+        """按预先计算的缓动位置安排各帧滚动"""
+        canvas = self.message_scrollable._parent_canvas
+        start, end = canvas.yview()
+        
+        # 如果已经在底部附近，直接跳转
+        if end > 0.95:
+            self._scroll_after_ids = []
+            canvas.yview_moveto(1.0)
+            return
         
-        self.after(50, smooth_scroll)
+        # 帧间隔均匀，位置按缓动比例变化
+        distance = 1.0 - start
+        frame_ms = _SMOOTH_SCROLL_MS // len(_SMOOTH_SCROLL_STEPS)
+        self._scroll_after_ids = [
+            self.after(frame * frame_ms, canvas.yview_moveto, start + distance * frac)
+            for frame, frac in enumerate(_SMOOTH_SCROLL_STEPS, 1)
+        ]
     
     def send_message(self):
         """发送消息"""
@@ -458,7 +851,6 @@ class ChatInterface(ctk.CTkFrame):
         self.add_send_animation()
         
         # 生成唯一消息ID
-        import time
         message_id = f"msg_{int(time.time() * 1000)}"
         
         # 创建消息对象
@@ -466,7 +858,7 @@ class ChatInterface(ctk.CTkFrame):
             "id": message_id,
             "sender": "me@example.com",
             "content": content,
-            "timestamp": datetime.now().strftime("%H:%M"),
+            "timestamp": _now_hm(),
             "is_sent": True,
             "status": "sending"  # 添加状态字段
         }
@@ -477,52 +869,73 @@ class ChatInterface(ctk.CTkFrame):
         # 清空输入框
         self.message_entry.delete("1.0", "end")
         
-        # 保存消息到数据库
-        if hasattr(self.parent, 'app') and hasattr(self.parent.app, 'database_manager'):
-            try:
-                self.parent.app.database_manager.add_message(
-                    contact_email=self.current_contact["email"],
-                    sender_email="me@example.com",
-                    receiver_email=self.current_contact["email"],
-                    content=content,
-                    is_sent=True
-                )
-            except Exception as e:
-                print(f"❌ 保存消息到数据库失败: {e}")
+        contact_email = self.current_contact["email"]
+        nickname = self.current_contact["nickname"]
         
         # 更新聊天列表中的最后消息
-        if hasattr(self.parent, 'chat_list'):
-            self.parent.chat_list.update_last_message(
-                self.current_contact["email"], 
-                content, 
-                datetime.now().strftime("%H:%M")
+        self._schedule_last_msg_update(contact_email, content, _now_hm())
+        
+        # 在后台线程保存消息并发送真实邮件，完成后回到主线程更新状态
+        if self._app_send is not None:
+            future = self._io_executor.submit(self._send_worker, self._app_send, contact_email, content)
+            self._expect_result()
+            future.add_done_callback(
+                lambda f: self._results.put((self._on_send_done, (message_id, nickname, content, f)))
             )
-        
-        # 发送真实邮件
-        if hasattr(self.parent, 'app') and hasattr(self.parent.app, 'send_message'):
-            try:
-                success = self.parent.app.send_message(self.current_contact["email"], content)
-                if success:
-                    print(f"📤 邮件已发送给 {self.current_contact['nickname']}: {content}")
-                    # 更新消息状态为已发送
-                    self.update_message_status(message_id, "sent")
-                    self.update_message_status_in_ui(message_id, "sent")
-                else:
-                    print(f"❌ 邮件发送失败")
-                    self.update_message_status(message_id, "failed")
-                    self.update_message_status_in_ui(message_id, "failed")
-            except Exception as e:
-                print(f"❌ 发送邮件出错: {e}")
-                self.update_message_status(message_id, "failed")
-                self.update_message_status_in_ui(message_id, "failed")
         else:
-            print(f"📤 模拟发送消息给 {self.current_contact['nickname']}: {content}")
+            self._io_executor.submit(
+                self._save_message, contact_email, "me@example.com", contact_email, content, True
+            )
+            print(f"📤 模拟发送消息给 {nickname}: {content}")
             # 模拟发送成功
             self.after(1000, lambda: self.update_message_status(message_id, "sent"))
             self.after(1000, lambda: self.update_message_status_in_ui(message_id, "sent"))
             # 模拟自动回复（仅在邮件功能不可用时）
             self.simulate_reply()
     
+    def _save_message(self, contact_email: str, sender_email: str, receiver_email: str,
+                      content: str, is_sent: bool):
+        """保存消息到数据库（在后台线程中执行）"""
+        if self._db is not None:
+            try:
+                self._db.add_message(
+                    contact_email=contact_email,
+                    sender_email=sender_email,
+                    receiver_email=receiver_email,
+                    content=content,
+                    is_sent=is_sent
+                )
+            except Exception as e:
+                print(f"❌ 保存消息到数据库失败: {e}")
+    
+    def _send_worker(self, send, contact_email: str, content: str) -> bool:
+        """保存并发送消息（在后台线程中执行），返回是否发送成功"""
+        self._save_message(contact_email, "me@example.com", contact_email, content, True)
+        try:
+            return bool(send(contact_email, content))
+        except Exception as e:
+            print(f"❌ 发送邮件出错: {e}")
+            return False
+    
+    def _on_send_done(self, message_id: str, nickname: str, content: str, future):
+        """在主线程中取出后台发送任务的结果"""
+        error = future.exception()
+        if error is not None:
+            print(f"❌ 保存或发送消息出错: {error}")
+        self._apply_send_result(message_id, nickname, content, error is None and future.result())
+    
+    def _apply_send_result(self, message_id: str, nickname: str, content: str, success: bool):
+        """在主线程中根据发送结果更新消息状态"""
+        if success:
+            print(f"📤 邮件已发送给 {nickname}: {content}")
+            # 更新消息状态为已发送
+            self.update_message_status(message_id, "sent")
+            self.update_message_status_in_ui(message_id, "sent")
+        else:
+            print("❌ 邮件发送失败")
+            self.update_message_status(message_id, "failed")
+            self.update_message_status_in_ui(message_id, "failed")
+    
     def update_message_status(self, message_id: str, status: str):
         """更新消息状态"""
         # 在实际项目中，这里可以更新消息的发送状态图标
@@ -546,10 +959,7 @@ class ChatInterface(ctk.CTkFrame):
         # 隐藏打字指示器
         self.hide_typing_indicator()
         
-        replies = language_manager.t("auto_replies")
-        
-        import random, time
-        reply_content = random.choice(replies)
+        reply_content = language_manager.random_auto_reply()
         
         # 生成唯一回复消息ID
         message_id = f"reply_{int(time.time() * 1000)}"
@@ -558,33 +968,40 @@ class ChatInterface(ctk.CTkFrame):
             "id": message_id,
             "sender": self.current_contact["email"],
             "content": reply_content,
-            "timestamp": datetime.now().strftime("%H:%M"),
+            "timestamp": _now_hm(),
             "is_sent": False
         }
         
         # 使用新的添加消息方法
         self.add_new_message(message)
         
-        # 保存自动回复到数据库
-        if hasattr(self.parent, 'app') and hasattr(self.parent.app, 'database_manager'):
-            try:
-                self.parent.app.database_manager.add_message(
-                    contact_email=self.current_contact["email"],
-                    sender_email=self.current_contact["email"],
-                    receiver_email="me@example.com",
-                    content=reply_content,
-                    is_sent=False
-                )
-            except Exception as e:
-                print(f"❌ 保存自动回复到数据库失败: {e}")
+        # 在后台线程保存自动回复到数据库
+        self._io_executor.submit(
+            self._save_message,
+            self.current_contact["email"],
+            self.current_contact["email"],
+            "me@example.com",
+            reply_content,
+            False
+        )
         
         # 更新聊天列表中的最后消息（自动回复）
-        if hasattr(self.parent, 'chat_list'):
-            self.parent.chat_list.update_last_message(
-                self.current_contact["email"], 
-                reply_content, 
-                datetime.now().strftime("%H:%M")
-            )
+        self._schedule_last_msg_update(self.current_contact["email"], reply_content, _now_hm())
+    
+    def _schedule_last_msg_update(self, email: str, content: str, timestamp: str):
+        """记录联系人的最后消息，延迟合并后再刷新聊天列表"""
+        if self._chat_list is None:
+            return
+        self._pending_last_msg[email] = (content, timestamp)
+        if self._last_msg_after_id is None:
+            self._last_msg_after_id = self.after(150, self._flush_last_msg)
+    
+    def _flush_last_msg(self):
+        """把合并后的最后消息更新应用到聊天列表"""
+        self._last_msg_after_id = None
+        pending, self._pending_last_msg = self._pending_last_msg, {}
+        for email, (content, timestamp) in pending.items():
+            self._chat_list.update_last_message(email, content, timestamp)
     
     def on_enter_key(self, event):
         """处理Enter键事件"""
@@ -632,16 +1049,23 @@ class ChatInterface(ctk.CTkFrame):
     def clear_chat(self):
         """清空聊天记录"""
         self.messages.clear()
-        for widget in self.message_scrollable.winfo_children():
-            widget.destroy()
+        self._message_ids.clear()
+        self._reset_messages_holder()
+        self._history_contact = None
     
-    def format_db_timestamp(self, timestamp):
-        """格式化数据库时间戳"""
+    def format_db_timestamp(self, timestamp, now_hm: Optional[str] = None):
+        """格式化数据库时间戳
+        
+        now_hm 为时间戳缺失时使用的当前时间文本，批量转换时由调用方只计算一次。
+        """
         if not timestamp:
-            return datetime.now().strftime("%H:%M")
+            return now_hm or _now_hm()
+        
+        # 快速路径：SQLite 存储的 "YYYY-MM-DD HH:MM:SS" / ISO 格式直接截取时分
+        if isinstance(timestamp, str) and len(timestamp) >= 16 and timestamp[10] in (" ", "T"):
+            return timestamp[11:16]
         
         try:
-            from datetime import datetime
             if isinstance(timestamp, str):
                 # 尝试解析时间字符串
                 try:
@@ -653,14 +1077,21 @@ class ChatInterface(ctk.CTkFrame):
             
             return dt.strftime("%H:%M")
         except Exception:
-            return datetime.now().strftime("%H:%M")
+            return _now_hm()
     
     def get_current_contact(self):
         """获取当前选中的联系人"""
         return self.current_contact
     
+    def _cache_status_texts(self):
+        """翻译并缓存在线/离线状态文本"""
+        self._t_online = language_manager.t("status_online")
+        self._t_offline = language_manager.t("status_offline")
+    
     def update_language(self):
         """更新组件语言"""
+        self._cache_status_texts()
+        
         # 更新发送按钮
         self.send_btn.configure(text=language_manager.t("send"))
         
@@ -671,9 +1102,7 @@ class ChatInterface(ctk.CTkFrame):
             # 重新显示欢迎界面
             self.show_welcome_screen()
         else:
-            # 如果有选中联系人，重新加载聊天记录
-            self.load_chat_history(self.current_contact)
-            # 更新联系人状态文本
+            # 消息气泡中没有需要翻译的文本，只更新联系人状态文本，不重新加载聊天记录
             self.update_contact_header(self.current_contact)
     
     def get_current_contact(self) -> Optional[Dict]:
@@ -687,12 +1116,12 @@ class ChatInterface(ctk.CTkFrame):
         
         # 创建打字指示器
         typing_frame = ctk.CTkFrame(
-            self.message_scrollable,
-            fg_color=get_color("gray_100"),
+            self._messages_holder,
+            fg_color=self._c["gray_100"],
             corner_radius=theme.RADIUS["lg"]
         )
         typing_frame.grid(
-            row=len(self.messages), 
+            row=1, 
             column=0, 
             sticky="w", 
             padx=(theme.SPACING["md"], theme.SPACING["4xl"]), 
@@ -703,12 +1132,14 @@ class ChatInterface(ctk.CTkFrame):
         typing_label = ctk.CTkLabel(
             typing_frame,
             text=f"{contact_name} 正在输入...",
-            font=get_font("sm"),
-            text_color=get_color("gray_600")
+            font=self._f["sm"],
+            text_color=self._c["gray_600"]
         )
         typing_label.pack(padx=theme.SPACING["md"], pady=theme.SPACING["sm"])
         
         self.typing_indicator = typing_frame
+        self._typing_base = f"{contact_name} 正在输入"
+        self._typing_dots = 3
         
         # 自动滚动到底部
         self.scroll_to_bottom_smooth()
@@ -718,29 +1149,25 @@ class ChatInterface(ctk.CTkFrame):
     
     def hide_typing_indicator(self):
         """隐藏打字指示器"""
+        if self._typing_after_id:
+            self.after_cancel(self._typing_after_id)
+            self._typing_after_id = None
         if self.typing_indicator:
             self.typing_indicator.destroy()
             self.typing_indicator = None
     
     def animate_typing_dots(self, label: ctk.CTkLabel):
         """打字指示器动画"""
-        if not self.typing_indicator:
+        self._typing_after_id = None
+        # 指示器已隐藏或窗口不可见（最小化、切到其他界面）时停止动画
+        if not self.typing_indicator or not self.winfo_viewable():
             return
         
-        current_text = label.cget("text")
-        base_text = current_text.split(" 正在输入")[0] + " 正在输入"
-        
-        dots_count = current_text.count(".")
-        if dots_count >= 3:
-            new_text = base_text
-        else:
-            new_text = current_text + "."
-        
-        label.configure(text=new_text)
+        self._typing_dots = (self._typing_dots + 1) % 4
+        label.configure(text=self._typing_base + _TYPING_DOTS[self._typing_dots])
         
         # 继续动画
-        if self.typing_indicator:
-            self.after(500, lambda: self.animate_typing_dots(label))
+        self._typing_after_id = self.after(500, self.animate_typing_dots, label)
     
     def add_message_with_time_group(self, message: Dict, row: int):
         """添加消息并处理时间分组"""
@@ -753,7 +1180,7 @@ class ChatInterface(ctk.CTkFrame):
             self.last_message_date = current_date
         
         # 添加消息气泡
-        message_container = MessageContainer(self.message_scrollable, message)
+        message_container = MessageContainer(self._messages_holder, message)
         message_container.grid(
             row=row, 
             column=0, 
@@ -767,23 +1194,11 @@ class ChatInterface(ctk.CTkFrame):
     def add_date_separator(self, date_str: str, row: int):
         """添加日期分隔符"""
         # 格式化日期显示
-        try:
-            from datetime import datetime
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            today = datetime.now().date()
-            
-            if date_obj.date() == today:
-                display_text = "今天"
-            elif (today - date_obj.date()).days == 1:
-                display_text = "昨天"
-            else:
-                display_text = date_obj.strftime("%m月%d日")
-        except:
-            display_text = date_str
+        display_text = _format_date_label(date_str, date.today().isoformat())
         
         # 创建日期分隔符
         separator_frame = ctk.CTkFrame(
-            self.message_scrollable,
+            self._messages_holder,
             fg_color="transparent",
             height=40
         )
@@ -794,9 +1209,9 @@ class ChatInterface(ctk.CTkFrame):
         date_label = ctk.CTkLabel(
             separator_frame,
             text=display_text,
-            font=get_font("xs"),
-            text_color=get_color("gray_500"),
-            fg_color=get_color("gray_100"),
+            font=self._f["xs"],
+            text_color=self._c["gray_500"],
+            fg_color=self._c["gray_100"],
             corner_radius=theme.RADIUS["full"]
         )
         date_label.pack(pady=theme.SPACING["sm"])
@@ -813,30 +1228,29 @@ class ChatInterface(ctk.CTkFrame):
         message_id = message.get("id", "")
         if "failed" in message_id:
             status_icon = "❌"
-            status_color = get_color("danger")
+            status_color = self._c["danger"]
         elif "sent" in message_id:
             status_icon = "✓"
-            status_color = get_color("success")
+            status_color = self._c["success"]
         else:
             status_icon = "○"  # 发送中
-            status_color = get_color("gray_400")
+            status_color = self._c["gray_400"]
         
         status_label = ctk.CTkLabel(
             status_frame,
             text=status_icon,
-            font=get_font("xs"),
+            font=self._f["xs"],
             text_color=status_color
         )
         status_label.pack(side="right")
     
     def update_message_status_in_ui(self, message_id: str, status: str):
         """在UI中更新消息状态"""
-        # 遍历消息组件，找到对应的消息并更新状态
-        for widget in self.message_scrollable.winfo_children():
-            if hasattr(widget, 'message_id') and widget.message_id == message_id:
-                # 更新状态指示器
-                self.refresh_message_status(widget, status)
-                break
+        # 按ID直接找到已渲染的消息组件（未渲染时无需更新）
+        widget = self._bubble_by_id.get(message_id)
+        if widget:
+            # 更新状态指示器
+            self.refresh_message_status(widget, status)
     
     def refresh_message_status(self, message_widget, status: str):
         """刷新消息状态指示器"""
@@ -850,12 +1264,12 @@ class ChatInterface(ctk.CTkFrame):
         original_color = self.send_btn.cget("fg_color")
         
         # 点击动画
-        self.send_btn.configure(fg_color=get_color("primary_dark"))
+        self.send_btn.configure(fg_color=self._c["primary_dark"])
         self.after(100, lambda: self.send_btn.configure(fg_color=original_color))
         
         # 输入框动画
-        self.message_entry.configure(border_color=get_color("success"))
-        self.after(200, lambda: self.message_entry.configure(border_color=get_color("gray_300")))
+        self.message_entry.configure(border_color=self._c["success"])
+        self.after(200, lambda: self.message_entry.configure(border_color=self._c["gray_300"]))
     
     def show_message_preview(self, content: str):
         """显示消息预览效果"""
@@ -864,4 +1278,40 @@ class ChatInterface(ctk.CTkFrame):
             preview = content[:100] + "..."
             # 可以在这里添加展开/收起功能
             return preview
-        return content 
\ No newline at end of file
+        return content
+    
+    def _expect_result(self):
+        """登记一个将把结果放入队列的后台任务，并确保主线程在轮询队列"""
+        self._pending_results += 1
+        if self._results_after_id is None:
+            self._results_after_id = self.after(50, self._drain_results)
+    
+    def _drain_results(self):
+        """主线程：处理后台任务放入队列的结果，仍有未完成任务时继续轮询"""
+        self._results_after_id = None
+        while True:
+            try:
+                handler, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending_results -= 1
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"❌ 处理后台任务结果失败: {e}")
+        if self._pending_results > 0:
+            self._results_after_id = self.after(50, self._drain_results)
+    
+    def destroy(self):
+        """销毁组件时停止接收新的后台任务（已提交的数据库写入仍会完成）"""
+        self._io_executor.shutdown(wait=False)
+        if self._results_after_id is not None:
+            self.after_cancel(self._results_after_id)
+            self._results_after_id = None
+        if self._last_msg_after_id is not None:
+            self.after_cancel(self._last_msg_after_id)
+            self._last_msg_after_id = None
+        if self._scroll_bottom_id is not None:
+            self.after_cancel(self._scroll_bottom_id)
+            self._scroll_bottom_id = None
+        super().destroy()
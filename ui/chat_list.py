@@ -8,13 +8,28 @@ E-Chat 聊天列表组件
 
 import customtkinter as ctk
 import tkinter as tk
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Optional, Callable
 # 导入语言管理器和主题配置
 from src.language_manager import language_manager
+from src.utils import format_time as _format_time
 from ui.theme_config import theme, get_color, get_font
 from ui.enhanced_components import SelectableFrame, ModernEntry, StatusIndicator
 
 
+# 联系人条目子控件共用的绑定标签：点击/悬停事件通过 bind_class 统一绑定一次
+_ITEM_TAG = "ChatListItem"
+
+
+@lru_cache(maxsize=1024)
+def _format_minute(minute: datetime, now_minute: int) -> str:
+    """按分钟格式化时间（显示结果只精确到分钟，now_minute 使缓存随当前时间推移失效）"""
+    return _format_time(minute)
+
+
 class ChatList(ctk.CTkFrame):
     """聊天列表组件"""
     
@@ -33,6 +48,12 @@ class ChatList(ctk.CTkFrame):
         self.selected_contact = None
         self.contacts = []  # 联系人列表
         self.contact_widgets = {}  # 存储联系人UI组件的映射
+        self._rendered_state = {}  # 邮箱 -> 条目上次显示时的联系人数据快照
+        self._widget_pool = []  # 移出列表的条目，供新出现的联系人复用
+        self._empty_label = None  # 无联系人时的提示标签
+        self._search_after_id = None  # 搜索输入防抖的 after 回调ID
+        # 搜索结果缓存：小写查询 -> 匹配的联系人列表（按最近使用排序，最多 32 条）
+        self._filter_cache = OrderedDict()
         
         # 固定宽度
         self.grid_propagate(False)
@@ -102,6 +123,11 @@ class ChatList(ctk.CTkFrame):
         self.scrollable_frame.grid(row=1, column=0, sticky="nsew", padx=0, pady=0)
         self.scrollable_frame.grid_columnconfigure(0, weight=1)
         
+        # 条目子控件的点击和悬停事件，转交给所属的联系人条目处理
+        self.bind_class(_ITEM_TAG, "<Button-1>", self._on_item_click)
+        self.bind_class(_ITEM_TAG, "<Enter>", self._on_item_enter)
+        self.bind_class(_ITEM_TAG, "<Leave>", self._on_item_leave)
+        
         print("📜 现代化联系人列表区域创建完成")
         
     def add_search_focus_effect(self):
@@ -130,6 +156,7 @@ class ChatList(ctk.CTkFrame):
                 
                 # 清空现有联系人列表以避免重复
                 self.contacts.clear()
+                self._filter_cache.clear()
                 
                 for contact in db_contacts:
                     # 转换数据库格式到UI格式
@@ -141,6 +168,7 @@ class ChatList(ctk.CTkFrame):
                         "unread_count": contact["unread_count"],
                         "online": contact["is_online"]
                     }
+                    self._normalize(ui_contact)
                     self.contacts.append(ui_contact)
                 
                 # 刷新UI显示
@@ -160,6 +188,9 @@ class ChatList(ctk.CTkFrame):
     
     def add_contact(self, contact_data: Dict):
         """添加联系人到列表"""
+        self._normalize(contact_data)
+        self._filter_cache.clear()
+        
         # 检查是否已存在该联系人
         for i, existing_contact in enumerate(self.contacts):
             if existing_contact["email"] == contact_data["email"]:
@@ -172,6 +203,11 @@ class ChatList(ctk.CTkFrame):
         self.contacts.append(contact_data)
         self.refresh_contact_list()
     
+    def _normalize(self, contact: Dict):
+        """缓存昵称和邮箱的小写形式，搜索时不必逐个重新转换"""
+        contact["_nickname_lc"] = contact["nickname"].lower()
+        contact["_email_lc"] = contact["email"].lower()
+    
     def update_contact_message(self, email: str, last_message: str, unread_count: int = 0):
         """更新联系人的最后消息和未读计数"""
         try:
@@ -181,7 +217,6 @@ class ChatList(ctk.CTkFrame):
                     self.contacts[i]["last_message"] = last_message
                     self.contacts[i]["unread_count"] = unread_count
                     # 设置当前时间
-                    from datetime import datetime
                     current_time = datetime.now()
                     self.contacts[i]["last_time"] = self.format_time(current_time)
                     
@@ -207,61 +242,116 @@ class ChatList(ctk.CTkFrame):
             print(f"❌ 安全刷新联系人列表失败: {e}")
 
     def refresh_contact_list(self, filter_text: str = ""):
-        """刷新联系人列表显示"""
+        """刷新联系人列表显示
+        
+        增量更新：只创建新出现的条目，数据变化的条目原地更新，
+        不再显示的条目移出网格放入复用池，而不是每次全部销毁重建。
+        """
         try:
-            # 清除现有联系人显示
-            for widget in self.scrollable_frame.winfo_children():
-                try:
-                    widget.destroy()
-                except:
-                    pass  # 忽略已经被销毁的widget
-            
-            # 清除联系人组件映射
-            self.contact_widgets.clear()
-            
             # 过滤联系人
             filtered_contacts = self.filter_contacts(filter_text)
+            new_emails = {contact["email"] for contact in filtered_contacts}
+            
+            # 移出不再显示的联系人条目，留待复用
+            for email in [email for email in self.contact_widgets if email not in new_emails]:
+                widget = self.contact_widgets.pop(email)
+                self._rendered_state.pop(email, None)
+                widget.grid_forget()
+                widget.is_selected = False  # 清除选中状态和高亮，复用时恢复悬停效果
+                widget.configure(fg_color="transparent")
+                widget.contact_index = None
+                self._widget_pool.append(widget)
             
             if not filtered_contacts:
                 # 显示空状态
-                empty_label = ctk.CTkLabel(
-                    self.scrollable_frame,
-                    text=language_manager.t("no_contacts"),
-                    font=get_font("base"),
-                    text_color=get_color("gray_500"),
-                    justify="center"
-                )
-                empty_label.grid(row=0, column=0, pady=50)
+                if self._empty_label is None:
+                    self._empty_label = ctk.CTkLabel(
+                        self.scrollable_frame,
+                        text="",
+                        font=get_font("base"),
+                        text_color=get_color("gray_500"),
+                        justify="center"
+                    )
+                self._empty_label.configure(text=language_manager.t("no_contacts"))
+                self._empty_label.grid(row=0, column=0, pady=50)
                 return
             
-            # 显示联系人
-            for i, contact in enumerate(filtered_contacts):
+            if self._empty_label is not None:
+                self._empty_label.grid_forget()
+            
+            # 需要新建多个条目时（如首次加载），先把滚动框架移出布局，
+            # 全部建好后再放回，只做一次布局计算
+            new_count = sum(1 for contact in filtered_contacts if contact["email"] not in self.contact_widgets)
+            if new_count - len(self._widget_pool) > 1:
+                self.scrollable_frame.grid_remove()
                 try:
-                    contact_item = self.create_contact_item(contact, i)
-                    contact_item.grid(row=i, column=0, sticky="ew", padx=theme.SPACING["sm"], pady=theme.SPACING["xs"])
-                    # 保存联系人组件映射
-                    self.contact_widgets[contact["email"]] = contact_item
-                except Exception as e:
-                    print(f"❌ 创建联系人项失败: {e}")
-                    continue
+                    self._layout_contacts(filtered_contacts)
+                finally:
+                    self.scrollable_frame.grid()
+            else:
+                self._layout_contacts(filtered_contacts)
                     
         except Exception as e:
             print(f"❌ 刷新联系人列表失败: {e}")
     
+    def _layout_contacts(self, filtered_contacts: List[Dict]):
+        """按顺序显示过滤后的联系人：复用或新建条目，更新变化的数据并调整位置"""
+        for i, contact in enumerate(filtered_contacts):
+            try:
+                email = contact["email"]
+                contact_item = self.contact_widgets.get(email)
+                if contact_item is None:
+                    if self._widget_pool:
+                        contact_item = self._widget_pool.pop()
+                        self.update_contact_item(contact_item, contact)
+                    else:
+                        contact_item = self.create_contact_item(contact, i)
+                        contact_item.contact_index = None  # 新条目尚未放入网格
+                    # 保存联系人组件映射
+                    self.contact_widgets[email] = contact_item
+                elif self._rendered_state.get(email) != contact:
+                    self.update_contact_item(contact_item, contact)
+                
+                # 只有位置变化时才重新放入网格
+                if contact_item.contact_index != i:
+                    contact_item.grid(row=i, column=0, sticky="ew", padx=theme.SPACING["sm"], pady=theme.SPACING["xs"])
+                    contact_item.contact_index = i
+                
+                self._rendered_state[email] = dict(contact)
+            except Exception as e:
+                print(f"❌ 创建联系人项失败: {e}")
+                continue
+    
     def filter_contacts(self, filter_text: str) -> List[Dict]:
         """根据搜索文本过滤联系人"""
         if not filter_text:
             return self.contacts
         
         filter_text = filter_text.lower()
-        filtered = []
-        
-        for contact in self.contacts:
-            # 搜索昵称和邮箱
-            if (filter_text in contact["nickname"].lower() or 
-                filter_text in contact["email"].lower()):
-                filtered.append(contact)
-        
+        cache = self._filter_cache
+        
+        cached = cache.get(filter_text)
+        if cached is not None:
+            cache.move_to_end(filter_text)
+            return cached
+        
+        # 能匹配新查询的联系人必然也匹配它的前缀，从最长的已缓存前缀结果中筛选即可
+        candidates = self.contacts
+        prefix_len = 0
+        for key, result in cache.items():
+            if len(key) > prefix_len and filter_text.startswith(key):
+                candidates = result
+                prefix_len = len(key)
+        
+        # 搜索昵称和邮箱（使用加入列表时缓存的小写形式）
+        filtered = [
+            contact for contact in candidates
+            if filter_text in contact["_nickname_lc"] or filter_text in contact["_email_lc"]
+        ]
+        
+        cache[filter_text] = filtered
+        if len(cache) > 32:
+            cache.popitem(last=False)
         return filtered
     
     def create_contact_item(self, contact: Dict, index: int) -> ctk.CTkFrame:
@@ -272,7 +362,7 @@ class ChatList(ctk.CTkFrame):
             height=76,
             corner_radius=theme.RADIUS["md"],
             fg_color="transparent",
-            on_click=lambda: self.select_contact(contact)
+            on_click=lambda: self.select_contact(item_frame.contact_data)
         )
         item_frame.grid_propagate(False)
         item_frame.grid_columnconfigure(1, weight=1)
@@ -350,63 +440,102 @@ class ChatList(ctk.CTkFrame):
         )
         message_label.grid(row=0, column=0, sticky="w")
         
-        # 现代化未读计数徽章
-        unread_count = contact.get("unread_count", 0)
-        if unread_count > 0:
-            badge_text = str(unread_count) if unread_count < 100 else "99+"
-            unread_badge = ctk.CTkLabel(
-                message_badge_frame,
-                text=badge_text,
-                font=get_font("xs", "bold"),
-                text_color=get_color("white"),
-                fg_color=get_color("danger"),
-                corner_radius=10,
-                width=20,
-                height=20
-            )
-            unread_badge.grid(row=0, column=1, sticky="e", padx=(theme.SPACING["sm"], 0))
+        # 现代化未读计数徽章（始终创建，没有未读时从网格中隐藏，便于更新时复用）
+        unread_badge = ctk.CTkLabel(
+            message_badge_frame,
+            text="",
+            font=get_font("xs", "bold"),
+            text_color=get_color("white"),
+            fg_color=get_color("danger"),
+            corner_radius=10,
+            width=20,
+            height=20
+        )
+        unread_badge.grid(row=0, column=1, sticky="e", padx=(theme.SPACING["sm"], 0))
         
-        # 现代化在线状态指示器
-        if contact["online"]:
-            status_indicator = StatusIndicator(
-                item_frame,
-                status="online"
-            )
-            status_indicator.grid(row=0, column=2, sticky="ne", padx=(0, theme.SPACING["md"]), pady=theme.SPACING["md"])
+        # 现代化在线状态指示器（同样始终创建，离线时隐藏）
+        status_indicator = StatusIndicator(
+            item_frame,
+            status="online"
+        )
+        status_indicator.grid(row=0, column=2, sticky="ne", padx=(0, theme.SPACING["md"]), pady=theme.SPACING["md"])
         
         # 保存组件引用
         item_frame.contact_data = contact
         item_frame.contact_index = index
-        
-        # 使用SelectableFrame的新方法绑定所有子组件
-        item_frame.bind_all_children()
+        item_frame.avatar_label = avatar_label
+        item_frame.name_label = name_label
+        item_frame.time_label = time_label
+        item_frame.message_label = message_label
+        item_frame.unread_badge = unread_badge
+        item_frame.status_indicator = status_indicator
+        self._apply_badge_and_status(item_frame, contact)
+        
+        # 子组件加上条目绑定标签，点击和悬停由 bind_class 的处理函数统一转交给条目
+        for widget in (avatar_frame, avatar_label, info_frame, name_time_frame, name_label,
+                       time_label, message_badge_frame, message_label, unread_badge, status_indicator):
+            # CTk 控件的事件实际落在其内部的 tk 子控件（画布、标签）上
+            for target in (widget, *widget.winfo_children()):
+                tags = target.bindtags()
+                if _ITEM_TAG not in tags:
+                    target.bindtags((tags[0], _ITEM_TAG) + tags[1:])
         
         return item_frame
     
-    def bind_contact_click(self, widget: ctk.CTkFrame, contact: Dict):
-        """绑定联系人点击事件"""
-        def on_click(event=None):
-            print(f"🖱️ 点击联系人: {contact['nickname']}")
-            self.select_contact(contact)
-            return "break"  # 阻止事件传播
-        
-        # 为主widget绑定点击事件
-        widget.bind("<Button-1>", on_click)
-        widget.configure(cursor="hand2")
-        
-        # 递归绑定所有子组件
-        def bind_recursive(w):
-            try:
-                w.bind("<Button-1>", on_click)
-                if hasattr(w, 'configure'):
-                    w.configure(cursor="hand2")
-            except:
-                pass
-            
-            for child in w.winfo_children():
-                bind_recursive(child)
+    def _item_from_event(self, event) -> Optional[SelectableFrame]:
+        """找到事件所在子控件所属的联系人条目"""
+        widget = event.widget
+        while widget is not None and not isinstance(widget, SelectableFrame):
+            widget = widget.master
+        return widget
+    
+    def _on_item_click(self, event):
+        """条目子控件点击事件"""
+        item = self._item_from_event(event)
+        if item is not None:
+            return item._on_click(event)
+    
+    def _on_item_enter(self, event):
+        """条目子控件鼠标进入事件"""
+        item = self._item_from_event(event)
+        if item is not None:
+            item._on_enter(event)
+    
+    def _on_item_leave(self, event):
+        """条目子控件鼠标离开事件"""
+        item = self._item_from_event(event)
+        if item is not None:
+            item._on_leave(event)
+    
+    def update_contact_item(self, item_frame: ctk.CTkFrame, contact: Dict):
+        """用新的联系人数据更新已创建的条目（不重建控件）"""
+        item_frame.contact_data = contact
+        
+        nickname = contact["nickname"]
+        item_frame.avatar_label.configure(text=nickname[0].upper() if nickname else "?")
+        item_frame.name_label.configure(text=nickname)
+        item_frame.time_label.configure(text=contact["last_time"])
+        
+        message_text = contact["last_message"]
+        if len(message_text) > 25:  # 限制消息长度
+            message_text = message_text[:25] + "..."
+        item_frame.message_label.configure(text=message_text)
+        
+        self._apply_badge_and_status(item_frame, contact)
+    
+    def _apply_badge_and_status(self, item_frame: ctk.CTkFrame, contact: Dict):
+        """根据未读数和在线状态显示或隐藏徽章与状态指示器"""
+        unread_count = contact.get("unread_count", 0)
+        if unread_count > 0:
+            item_frame.unread_badge.configure(text=str(unread_count) if unread_count < 100 else "99+")
+            item_frame.unread_badge.grid()
+        else:
+            item_frame.unread_badge.grid_remove()
         
-        bind_recursive(widget)
+        if contact["online"]:
+            item_frame.status_indicator.grid()
+        else:
+            item_frame.status_indicator.grid_remove()
     
     def select_contact(self, contact: Dict):
         """选择联系人"""
@@ -432,6 +561,7 @@ class ChatList(ctk.CTkFrame):
                 if hasattr(widget, 'set_selected'):
                     widget.set_selected(False)
                 else:
+                    widget.is_selected = False  # 点击时 select() 置位的标志，需一并清除
                     widget.configure(fg_color="transparent")
             except:
                 pass
@@ -443,12 +573,20 @@ class ChatList(ctk.CTkFrame):
                 if hasattr(selected_widget, 'set_selected'):
                     selected_widget.set_selected(True)
                 else:
+                    selected_widget.is_selected = True  # 悬停时不覆盖选中高亮
                     selected_widget.configure(fg_color=get_color("primary", 0.15))
             except:
                 pass
     
     def on_search_change(self, event=None):
-        """搜索框内容改变事件"""
+        """搜索框内容改变事件（防抖，停止输入130ms后再刷新列表）"""
+        if self._search_after_id:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(130, self._do_search)
+    
+    def _do_search(self):
+        """执行搜索并刷新联系人列表"""
+        self._search_after_id = None
         search_text = self.search_entry.get()
         self.refresh_contact_list(search_text)
         print(f"🔍 搜索: {search_text}")
@@ -478,7 +616,6 @@ class ChatList(ctk.CTkFrame):
             return ""
         
         try:
-            from datetime import datetime
             if isinstance(timestamp, str):
                 # 尝试解析时间字符串
                 try:
@@ -488,9 +625,8 @@ class ChatList(ctk.CTkFrame):
             else:
                 dt = timestamp
             
-            # 使用工具函数格式化时间
-            from src.utils import format_time
-            return format_time(dt)
+            # 使用工具函数格式化时间（同一分钟内的时间共享缓存结果）
+            return _format_minute(dt.replace(second=0, microsecond=0), int(time.time() // 60))
         except Exception:
             return str(timestamp)
     
@@ -518,6 +654,7 @@ class ChatList(ctk.CTkFrame):
         
         # 重新加载联系人数据（不使用示例数据）
         self.contacts.clear()
+        self._filter_cache.clear()
         self.add_sample_contacts()
         
         # 刷新显示
@@ -9,10 +9,23 @@ E-Chat 联系人条目组件
 import customtkinter as ctk
 from typing import Dict, Callable, Optional
 
+# 联系人条目子控件共用的绑定标签，点击事件通过 bind_class 只绑定一次
+_CLICK_TAG = "ContactItemClick"
+
+# 头像候选颜色
+_AVATAR_COLORS = (
+    "#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4",
+    "#FECA57", "#FF9FF3", "#54A0FF", "#5F27CD",
+    "#00D2D3", "#FF9F43", "#FD79A8", "#E17055"
+)
+
 
 class ContactItem(ctk.CTkFrame):
     """联系人条目组件"""
     
+    # 是否已为绑定标签注册点击处理函数
+    _click_class_bound = False
+    
     def __init__(self, parent, contact: Dict, on_click: Optional[Callable] = None, **kwargs):
         """
         初始化联系人条目
@@ -161,38 +174,48 @@ class ContactItem(ctk.CTkFrame):
             self.status_indicator.grid(row=0, column=2, sticky="ne", padx=(0, 8), pady=8)
     
     def get_avatar_color(self) -> str:
-        """根据姓名生成头像颜色"""
-        colors = [
-            "#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", 
-            "#FECA57", "#FF9FF3", "#54A0FF", "#5F27CD",
-            "#00D2D3", "#FF9F43", "#FD79A8", "#E17055"
-        ]
-        
-        # 基于邮箱地址生成颜色索引
-        email = self.contact.get("email", "")
-        color_index = sum(ord(c) for c in email) % len(colors)
-        return colors[color_index]
+        """根据邮箱生成头像颜色（结果缓存在联系人数据的 _avatar_color 中）"""
+        color = self.contact.get("_avatar_color")
+        if color is None:
+            # 基于邮箱地址生成颜色索引，每个联系人只计算一次
+            email = self.contact.get("email", "")
+            color = _AVATAR_COLORS[sum(map(ord, email)) % len(_AVATAR_COLORS)]
+            self.contact["_avatar_color"] = color
+        return color
     
     def bind_click_events(self):
         """绑定点击事件"""
-        def on_click_handler(event=None):
-            if self.on_click:
-                self.on_click(self.contact)
-            return "break"
-        
-        # 为主widget和所有子组件绑定点击事件
-        def bind_recursive(widget):
-            try:
-                widget.bind("<Button-1>", on_click_handler)
-                if hasattr(widget, 'configure'):
-                    widget.configure(cursor="hand2")
-            except:
-                pass
-            
-            for child in widget.winfo_children():
-                bind_recursive(child)
+        if not ContactItem._click_class_bound:
+            self.bind_class(_CLICK_TAG, "<Button-1>", ContactItem._on_tag_click)
+            ContactItem._click_class_bound = True
         
-        bind_recursive(self)
+        # 为主widget和已知的子组件加上绑定标签（光标由子控件从条目继承）
+        self._tag_widgets(self, self.avatar_frame, self.avatar_label, self.info_frame,
+                          self.name_label.master, self.name_label, self.time_label,
+                          self.message_label.master, self.message_label)
+        if hasattr(self, 'unread_badge'):
+            self._tag_widgets(self.unread_badge)
+        if hasattr(self, 'status_indicator'):
+            self._tag_widgets(self.status_indicator)
+    
+    @staticmethod
+    def _tag_widgets(*widgets):
+        """为控件及其内部的 tk 子控件（画布、标签等）加上点击绑定标签"""
+        for widget in widgets:
+            for target in (widget, *widget.winfo_children()):
+                tags = target.bindtags()
+                if _CLICK_TAG not in tags:
+                    target.bindtags((tags[0], _CLICK_TAG) + tags[1:])
+    
+    @staticmethod
+    def _on_tag_click(event):
+        """绑定标签的点击处理：找到所属的联系人条目并调用回调"""
+        widget = event.widget
+        while widget is not None and not isinstance(widget, ContactItem):
+            widget = widget.master
+        if widget is not None and widget.on_click:
+            widget.on_click(widget.contact)
+        return "break"
     
     def set_selected(self, selected: bool):
         """设置选中状态"""
@@ -207,6 +230,11 @@ class ContactItem(ctk.CTkFrame):
     
     def update_contact(self, contact: Dict):
         """更新联系人信息"""
+        # 邮箱变化时头像颜色缓存失效；邮箱不变则沿用已计算的颜色
+        if contact.get("email") != self.contact.get("email"):
+            contact.pop("_avatar_color", None)
+        elif "_avatar_color" in self.contact:
+            contact.setdefault("_avatar_color", self.contact["_avatar_color"])
         self.contact = contact
         
         # 更新姓名
@@ -262,6 +290,7 @@ class ContactItem(ctk.CTkFrame):
                     height=20
                 )
                 self.unread_badge.grid(row=0, column=1, sticky="e", padx=(5, 0))
+                self._tag_widgets(self.unread_badge)
     
     def update_online_status(self, online: bool):
         """更新在线状态"""
@@ -279,6 +308,7 @@ class ContactItem(ctk.CTkFrame):
                 text_color="green"
             )
             self.status_indicator.grid(row=0, column=2, sticky="ne", padx=(0, 8), pady=8)
+            self._tag_widgets(self.status_indicator)
     
     def get_contact_data(self) -> Dict:
         """获取联系人数据"""